@@ -0,0 +1,230 @@
+import os
+import threading
+import time
+
+from metrics import counter
+
+# Batas per proses; setiap worker Streamlit punya gate sendiri.
+SUBMIT_RATE = float(os.getenv("SUBMIT_RATE") or 20)  # submit per detik
+SUBMIT_BURST = int(os.getenv("SUBMIT_BURST") or 40)
+SUBMIT_CONCURRENCY = int(os.getenv("SUBMIT_CONCURRENCY") or 8)
+DB_RATE = float(os.getenv("DB_RATE") or 10)  # bulk insert (flush write buffer) per detik
+DB_BURST = int(os.getenv("DB_BURST") or 20)
+DB_CONCURRENCY = int(os.getenv("DB_CONCURRENCY") or 2)
+SMTP_RATE = float(os.getenv("SMTP_RATE") or 5)  # email per detik
+SMTP_BURST = int(os.getenv("SMTP_BURST") or 10)
+ADMIT_TIMEOUT = float(os.getenv("ADMIT_TIMEOUT") or 3.0)  # detik menunggu token/slot sebelum ditolak
+BREAKER_THRESHOLD = int(os.getenv("BREAKER_THRESHOLD") or 5)  # kegagalan beruntun sebelum breaker terbuka
+BREAKER_COOLDOWN = float(os.getenv("BREAKER_COOLDOWN") or 30.0)  # detik sebelum percobaan ulang
+
+class Rejected(RuntimeError):
+    """Ditolak admission control (rate limit, slot penuh, atau breaker terbuka) dan tidak ada fallback."""
+
+class TokenBucket:
+    """Rate limiter: `rate` token per detik, menampung hingga `capacity` token untuk burst."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, timeout=0.0) -> bool:
+        """Ambil satu token, menunggu hingga `timeout` detik. False jika tidak kebagian."""
+        deadline = time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    def available(self) -> float:
+        with self._lock:
+            self._refill(time.monotonic())
+            return self._tokens
+
+class CircuitBreaker:
+    """
+    closed -> open setelah `threshold` kegagalan beruntun. Setelah `cooldown`
+    detik breaker half-open: satu permintaan percobaan boleh lewat; berhasil
+    menutup breaker, gagal membukanya lagi.
+    """
+
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.trips = 0
+        self._opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    def _state(self, now):
+        if self._opened_at is None:
+            return "closed"
+        return "half_open" if now - self._opened_at >= self.cooldown else "open"
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state(time.monotonic())
+
+    def retry_after(self) -> float:
+        """Detik sampai breaker boleh dicoba lagi (0 jika tidak terbuka)."""
+        with self._lock:
+            if self._opened_at is None:
+                return 0.0
+            return max(0.0, self._opened_at + self.cooldown - time.monotonic())
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self._state(time.monotonic())
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self._opened_at = None
+            self._trial = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial or (self._opened_at is None and self.failures >= self.threshold):
+                self._opened_at = time.monotonic()
+                self.trips += 1
+            self._trial = False
+
+class AdmissionGate:
+    """
+    Admission control di depan satu dependency (DB, SMTP): token bucket untuk
+    laju, semaphore untuk jumlah panggilan bersamaan, dan circuit breaker yang
+    menghentikan panggilan saat dependency terus gagal. Permintaan yang tidak
+    lolos atau gagal dialihkan ke `fallback` jika ada.
+    """
+
+    def __init__(self, name, rate, burst, concurrency, timeout=ADMIT_TIMEOUT,
+                 threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN):
+        self.name = name
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(threshold, cooldown)
+        self._slots = threading.BoundedSemaphore(concurrency)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.counts = {"admitted": 0, "failed": 0, "rejected": 0, "open": 0, "fallback": 0}
+
+    def _count(self, result):
+        with self._lock:
+            self.counts[result] += 1
+        counter("survey_admission_total", "Keputusan admission control per gate").inc(gate=self.name, result=result)
+
+    def _divert(self, reason, fallback):
+        self._count(reason)
+        if fallback is None:
+            raise Rejected(f"{self.name}: {reason}")
+        self._count("fallback")
+        return fallback()
+
+    def run(self, fn, fallback=None):
+        """
+        Jalankan fn() jika lolos rate limit, slot dan breaker. Hasil falsy atau
+        exception dihitung sebagai kegagalan untuk breaker. Jika ditolak atau
+        gagal dan ada `fallback`, hasil fallback() yang dikembalikan; tanpa
+        fallback, penolakan raise Rejected dan kegagalan diteruskan apa adanya.
+        """
+        deadline = time.monotonic() + self.timeout
+        if not self.bucket.acquire(self.timeout):
+            return self._divert("rejected", fallback)
+        if not self._slots.acquire(timeout=max(0.0, deadline - time.monotonic())):
+            return self._divert("rejected", fallback)
+        try:
+            if not self.breaker.allow():
+                return self._divert("open", fallback)
+            with self._lock:
+                self.in_flight += 1
+            try:
+                result = fn()
+            except Exception as e:
+                self.breaker.record_failure()
+                self._count("failed")
+                if fallback is None:
+                    raise
+                print(f"{self.name} gagal, dialihkan ke fallback:", e)
+                self._count("fallback")
+                return fallback()
+            finally:
+                with self._lock:
+                    self.in_flight -= 1
+            if not result:
+                self.breaker.record_failure()
+                self._count("failed")
+                if fallback is not None:
+                    self._count("fallback")
+                    return fallback()
+                return result
+            self.breaker.record_success()
+            self._count("admitted")
+            return result
+        finally:
+            self._slots.release()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = dict(self.counts)
+            in_flight = self.in_flight
+        return {
+            "name": self.name,
+            "state": self.breaker.state,
+            "failures": self.breaker.failures,
+            "trips": self.breaker.trips,
+            "retry_after": self.breaker.retry_after(),
+            "tokens": self.bucket.available(),
+            "burst": self.bucket.capacity,
+            "rate": self.bucket.rate,
+            "in_flight": in_flight,
+            "concurrency": self.concurrency,
+            **counts,
+        }
+
+# "submit" membatasi jalur submit (tulis ke antrian write buffer); "db" membungkus
+# panggilan ke database itu sendiri (flush write buffer), jadi breaker-nya
+# terbuka saat database mati walau submit tetap diterima di antrian.
+GATE_CONFIG = {
+    "submit": {"rate": SUBMIT_RATE, "burst": SUBMIT_BURST, "concurrency": SUBMIT_CONCURRENCY},
+    "db": {"rate": DB_RATE, "burst": DB_BURST, "concurrency": DB_CONCURRENCY},
+    "smtp": {"rate": SMTP_RATE, "burst": SMTP_BURST, "concurrency": 1},
+}
+
+_gates = {}
+_gates_lock = threading.Lock()
+
+def get_gate(name) -> AdmissionGate:
+    """Gate tunggal per proses untuk dependency `name` (lihat GATE_CONFIG)."""
+    with _gates_lock:
+        if name not in _gates:
+            _gates[name] = AdmissionGate(name, **GATE_CONFIG[name])
+        return _gates[name]
+
+def gate_states() -> list:
+    """Snapshot semua gate yang sudah dipakai di proses ini."""
+    with _gates_lock:
+        gates = list(_gates.values())
+    return [gate.snapshot() for gate in gates]
@@ -1,11 +1,15 @@
 import streamlit as st
-import pandas as pd
-import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from dotenv import load_dotenv 
 import os 
-from supabase_manager import save_survey_response
+import html
+from storage import save_survey_response
+from email_queue import get_email_queue
+from drafts import get_draft_store, new_token
+from idempotency import get_submission_index, submission_key
+from metrics import counter, profile_rerun, start_exporters, timed, timer
+from response_model import SurveyResponse
 
 st.set_page_config(
     page_title="Survei Aplikasi Orange Wallet", 
@@ -25,50 +29,53 @@ try:
     }
 except Exception:
     pass
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "1") != "0"  # set 0 untuk SMTP stand-in lokal
 
+def build_survey_email(recipient_email, recipient_name, survey_data):
+    """Menyusun email ringkasan (MIME string) untuk pengisi survei."""
+    subject = "🎉 Terima Kasih! Ringkasan Hasil Survei Orange Wallet"
+    
+    data_display = "\n".join([
+        f"- {k.replace('_', ' ').title().replace('Va', 'VA')}: {v}" 
+        for k, v in survey_data.items() 
+        if k not in ['nama', 'email', 'anonim', 'timestamp', 'submission_id', 'schema_version']
+    ])
+
+    html_content = f"""
+    <html>
+    <body style="font-family: Arial, sans-serif;">
+        <h2>Halo {recipient_name},</h2>
+        <p>Terima kasih telah mencoba dan memberikan masukan untuk <strong>Orange Wallet</strong>.</p>
+        <hr>
+        <h3>Ringkasan Jawaban Anda:</h3>
+        <pre style="background: #f4f4f4; padding: 15px; border-radius: 5px;">{data_display}</pre>
+        <hr>
+        <p>Salam hangat,<br>Tim Orange Wallet BNI</p>
+    </body>
+    </html>
+    """
+
+    msg = MIMEMultipart('alternative')
+    msg['Subject'] = subject
+    msg['From'] = SMTP_CONFIG["MAIL"]
+    msg['To'] = recipient_email
+    msg.attach(MIMEText(html_content, 'html'))
+    return msg.as_string()
+
+@timed("survey_send_email_seconds", "Latensi send_survey_email (build + enqueue)")
 def send_survey_email(recipient_email, recipient_name, survey_data):
-    """Mengirim email ringkasan ke pengisi survei."""
+    """Memasukkan email ringkasan ke antrian; pengiriman SMTP berjalan di background."""
     if not all(SMTP_CONFIG.values()):
+        counter("survey_failures_total", "Kegagalan per komponen").inc(component="smtp_config")
         st.error("Konfigurasi email server belum lengkap.")
         return False
 
     try:
-        subject = "🎉 Terima Kasih! Ringkasan Hasil Survei Orange Wallet"
-        
-        data_display = "\n".join([
-            f"- {k.replace('_', ' ').title().replace('Va', 'VA')}: {v}" 
-            for k, v in survey_data.items() 
-            if k not in ['nama', 'email', 'anonim', 'timestamp']
-        ])
-
-        html_content = f"""
-        <html>
-        <body style="font-family: Arial, sans-serif;">
-            <h2>Halo {recipient_name},</h2>
-            <p>Terima kasih telah mencoba dan memberikan masukan untuk <strong>Orange Wallet</strong>.</p>
-            <hr>
-            <h3>Ringkasan Jawaban Anda:</h3>
-            <pre style="background: #f4f4f4; padding: 15px; border-radius: 5px;">{data_display}</pre>
-            <hr>
-            <p>Salam hangat,<br>Tim Orange Wallet BNI</p>
-        </body>
-        </html>
-        """
-
-        msg = MIMEMultipart('alternative')
-        msg['Subject'] = subject
-        msg['From'] = SMTP_CONFIG["MAIL"]
-        msg['To'] = recipient_email
-        msg.attach(MIMEText(html_content, 'html'))
-
-        server = smtplib.SMTP(SMTP_CONFIG["HOST"], SMTP_CONFIG["PORT"])
-        server.starttls()
-        server.login(SMTP_CONFIG["MAIL"], SMTP_CONFIG["PASSWORD"])
-        server.sendmail(SMTP_CONFIG["MAIL"], recipient_email, msg.as_string())
-        server.quit()
-        
+        message = build_survey_email(recipient_email, recipient_name, survey_data)
+        get_email_queue(SMTP_CONFIG, starttls=SMTP_STARTTLS).enqueue(recipient_email, message)
         return True
     except Exception as e:
+        counter("survey_failures_total", "Kegagalan per komponen").inc(component="smtp")
         st.error(f"Gagal mengirim email: {e}")
         return False
 if 'page' not in st.session_state:
@@ -76,9 +83,37 @@ if 'page' not in st.session_state:
 if 'data' not in st.session_state:
     st.session_state.data = {}
 
-def next_page(): st.session_state.page += 1
-def prev_page(): st.session_state.page -= 1
+def checkpoint():
+    """Simpan progres (halaman + jawaban) ke draft store untuk token resume sesi ini."""
+    # Setelah submit berhasil draft sudah dibuang; navigasi (mis. "Kembali") tidak boleh menyimpannya lagi.
+    if 'draft_token' in st.session_state and 'submitted_key' not in st.session_state:
+        get_draft_store().save(st.session_state.draft_token, st.session_state.page, st.session_state.data)
+
+def restore_draft():
+    """Sekali per sesi: lanjutkan draft dari ?resume=<token>, atau beri sesi token baru."""
+    if 'draft_token' in st.session_state:
+        return
+    token = st.query_params.get("resume")
+    draft = get_draft_store().load(token) if token else None
+    if draft is not None:
+        st.session_state.page = draft['page']
+        st.session_state.data = draft['data']
+    elif not token:
+        token = new_token()
+        st.query_params["resume"] = token
+    st.session_state.draft_token = token
+
+def next_page():
+    st.session_state.page += 1
+    checkpoint()
+def prev_page():
+    st.session_state.page -= 1
+    checkpoint()
 def reset_survey():
+    get_draft_store().discard(st.session_state.draft_token)
+    st.session_state.draft_token = new_token()
+    st.query_params["resume"] = st.session_state.draft_token
+    st.session_state.pop('submitted_key', None)
     st.session_state.data = {}
     st.session_state.page = 1
     st.rerun()
@@ -117,13 +152,55 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
+APP_URL = "https://app.orangebybni.my.id"
+VA_URL = "https://va-payment-481374538659.asia-southeast2.run.app/"
+SIMULATOR_LAYOUT = [1, 1]  # sama di halaman 1-3 agar posisi simulator tidak berubah
+
+def simulator_html(url, height):
+    """
+    HTML simulator (string tetap per url dan tinggi). Iframe baru memuat `src`
+    saat mendekati viewport (IntersectionObserver); browser lama langsung memuat.
+    """
+    src = html.escape(url, quote=True)
+    return f"""
+    <iframe data-src="{src}" title="Simulator"
+            style="width:100%;height:{height}px;border:1px solid #e0e0e0;border-radius:10px;"></iframe>
+    <script>
+        const frame = document.querySelector("iframe[data-src]");
+        const load = () => {{ if (!frame.src) frame.src = frame.dataset.src; }};
+        if ("IntersectionObserver" in window) {{
+            new IntersectionObserver((entries, observer) => {{
+                if (entries.some(e => e.isIntersecting)) {{ load(); observer.disconnect(); }}
+            }}, {{rootMargin: "200px"}}).observe(frame);
+        }} else {{
+            load();
+        }}
+    </script>
+    """
+
+APP_SIMULATOR_HTML = simulator_html(APP_URL, 850)
+VA_SIMULATOR_HTML = simulator_html(VA_URL, 500)
+
+def render_simulator(caption):
+    """
+    Simulator aplikasi utama dengan argumen dan posisi yang identik di halaman
+    1-3, di luar form. Frontend Streamlit lalu memakai ulang elemen yang sama,
+    sehingga rerun (klik form, pindah halaman) tidak me-reload simulator.
+    """
+    st.subheader("📱 Simulator Aplikasi")
+    st.caption(caption)
+    st.components.v1.html(APP_SIMULATOR_HTML, height=860)
+
 def page_1_intro():
     st.title("🍊 Survei Kepuasan Orange Wallet")
     st.markdown("---")
     
-    col_left, col_right = st.columns([1, 1.5])
+    col_sim, col_form = st.columns(SIMULATOR_LAYOUT, gap="medium")
+
+    with col_sim:
+        render_simulator("Silakan eksplorasi halaman login/profil di sini.")
     
-    with col_left:
+    with col_form:
         st.subheader("1. Data Pengisi")
         is_anon = st.checkbox("Isi secara **Anonim**", value=(st.session_state.data.get('anonim') == 'Ya'))
         
@@ -146,33 +223,24 @@ def page_1_intro():
             st.markdown("<br>", unsafe_allow_html=True)
             st.button("Mulai Uji Coba (Next) ➡️", on_click=next_page, use_container_width=True)
 
-    with col_right:
-        st.subheader("Preview Aplikasi")
-        st.caption("Silakan eksplorasi halaman login/profil di sini.")
-        st.components.v1.iframe("https://app.orangebybni.my.id", height=700, scrolling=True)
-
 
 
 def page_2_flow_topup_transfer():
     st.header("Bagian 2/5: Uji Coba Top Up & Transfer")
     st.progress(25)
     
-    with st.form("form_p2"):
-        col_sim, col_q = st.columns([1, 1], gap="medium")
+    col_sim, col_q = st.columns(SIMULATOR_LAYOUT, gap="medium")
+    
+    with col_sim:
+        render_simulator("1. App Utama (Transfer & Top Up Menu). Gunakan area ini untuk mencoba fitur.")
         
-        with col_sim:
-            st.subheader("📱 Simulator Aplikasi")
-            st.info("Gunakan area ini untuk mencoba fitur.")
-            
-            st.markdown("**1. App Utama (Transfer & Top Up Menu)**")
-            st.components.v1.iframe("https://app.orangebybni.my.id", height=850, scrolling=True)
-            
-            st.markdown("---")
-            
-            st.markdown("**2. Halaman Virtual Account (Simulasi)**")
-            st.components.v1.iframe("https://va-payment-481374538659.asia-southeast2.run.app/", height=500, scrolling=True)
+        st.markdown("---")
+        
+        st.markdown("**2. Halaman Virtual Account (Simulasi)**")
+        st.components.v1.html(VA_SIMULATOR_HTML, height=510)
 
-        with col_q:
+    with col_q:
+        with st.form("form_p2"):
             st.subheader("📝 Lembar Evaluasi")
             
             st.markdown("#### A. Fitur Top Up")
@@ -210,15 +278,13 @@ def page_3_flow_advanced():
     st.header("Bagian 3/5: Split Bill & Shared Wallet")
     st.progress(50)
     
-    with st.form("form_p3"):
-        col_sim, col_q = st.columns([1, 1], gap="medium")
-        
-        with col_sim:
-            st.subheader("📱 Simulator Aplikasi")
-            st.info("Coba menu 'Split Bill' atau 'Create Wallet' > 'Shared'.")
-            st.components.v1.iframe("https://app.orangebybni.my.id", height=850, scrolling=True)
+    col_sim, col_q = st.columns(SIMULATOR_LAYOUT, gap="medium")
+    
+    with col_sim:
+        render_simulator("Coba menu 'Split Bill' atau 'Create Wallet' > 'Shared'.")
 
-        with col_q:
+    with col_q:
+        with st.form("form_p3"):
             st.subheader("📝 Lembar Evaluasi")
             
             st.markdown("#### A. Split Bill")
@@ -302,8 +368,14 @@ def page_5_final():
         
         final_msg = st.text_area("Pesan Terakhir untuk Tim Developer:")
         
-        submitted = st.form_submit_button("🎉 KIRIM SURVEI", use_container_width=True)
-        
+        # Setelah submit berhasil tombol dimatikan; klik ganda/rerun tidak mengirim ulang.
+        already_sent = 'submitted_key' in st.session_state
+        submitted = st.form_submit_button("🎉 KIRIM SURVEI", use_container_width=True, disabled=already_sent)
+
+        if already_sent and not submitted:
+            st.success("✅ Survei Anda sudah terkirim. Terima kasih!")
+            st.form_submit_button("Isi Survei Baru ulang", on_click=reset_survey)
+
         if submitted:
             if not final_use:
                 st.error("Mohon jawab pertanyaan niat penggunaan.")
@@ -314,40 +386,55 @@ def page_5_final():
                     'pesan_akhir': final_msg
                 })
                 
-                data_final = st.session_state.data
-                
-                db_status = save_survey_response(data_final)
+                response = SurveyResponse.from_dict(st.session_state.data)
+                errors = response.validate()
+                if errors:
+                    st.error("⚠️ Jawaban belum valid: " + "; ".join(errors))
+                    st.stop()
+                data_final = response.to_dict()
                 
-                mail_status = True
-                if data_final.get('anonim') == 'Tidak':
-                    with st.spinner("Mengirim email ringkasan..."):
-                        mail_status = send_survey_email(data_final['email'], data_final['nama'], data_final)
+                key = submission_key(st.session_state.draft_token, data_final)
+                duplicate = key in get_submission_index()
+                db_status = save_survey_response(data_final, idempotency_key=key)
                 
-                if db_status:
-                    st.success("✅ Data berhasil disimpan!")
+                if not db_status:
+                    # Klaim idempotency sudah dilepas: kirim ulang nanti tetap dianggap submit baru,
+                    # jadi email baru dikirim saat penyimpanan berhasil.
+                    st.error("⚠️ Data gagal disimpan. Mohon coba kirim ulang beberapa saat lagi.")
                 else:
-                    st.warning("⚠️ Data tersimpan lokal (Gagal koneksi DB), namun survei selesai.")
+                    st.session_state.submitted_key = key
+                    get_draft_store().discard(st.session_state.draft_token)
+                    st.success("✅ Data berhasil disimpan!")
                     
-                if mail_status and data_final.get('anonim') == 'Tidak':
-                    st.info(f"📧 Email ringkasan telah dikirim ke {data_final['email']}")
-                
-                st.balloons()
-                st.write("---")
-                # st.json(data_final, expanded=False)
-                
-                st.form_submit_button("Isi Survei Baru ulang", on_click=reset_survey)
+                    if data_final.get('anonim') == 'Tidak' and not duplicate:
+                        if send_survey_email(data_final['email'], data_final['nama'], data_final):
+                            st.info(f"📧 Email ringkasan sedang dikirim ke {data_final['email']}")
+                    
+                    st.balloons()
+                    st.write("---")
+                    # st.json(data_final, expanded=False)
+                    
+                    st.form_submit_button("Isi Survei Baru ulang", on_click=reset_survey)
 
     st.button("⬅️ Kembali", on_click=prev_page)
 
 
 
 def main():
+    start_exporters()
+    if all(SMTP_CONFIG.values()):
+        # Worker email jalan sejak proses hidup agar sisa antrian bersama ikut terkirim.
+        get_email_queue(SMTP_CONFIG, starttls=SMTP_STARTTLS)
+    restore_draft()
     pg = st.session_state.page
-    if pg == 1: page_1_intro()
-    elif pg == 2: page_2_flow_topup_transfer()
-    elif pg == 3: page_3_flow_advanced()
-    elif pg == 4: page_4_uiux()
-    elif pg == 5: page_5_final()
+    # Durasi rerun dicatat per halaman awal rerun; profiler aktif jika dinyalakan dari admin.
+    with timer("survey_rerun_seconds", "Durasi rerun Streamlit per halaman", page=str(pg)), \
+            profile_rerun(f"survey halaman {pg}"):
+        if pg == 1: page_1_intro()
+        elif pg == 2: page_2_flow_topup_transfer()
+        elif pg == 3: page_3_flow_advanced()
+        elif pg == 4: page_4_uiux()
+        elif pg == 5: page_5_final()
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,33 @@
+"""
+Memori frame respon: DataFrame dari list dict (object) vs schema.to_compact_frame.
+
+    python benchmarks/bench_memory.py [--rows 1000000]
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from schema import memory_report, to_compact_frame
+from synthetic import make_frame
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    raw = make_frame(args.rows).astype(object)
+    start = time.perf_counter()
+    compact = to_compact_frame(raw)
+    elapsed = time.perf_counter() - start
+    report = memory_report(raw, compact)
+
+    print(f"{'kolom':<20} {'dtype':<18} {'sebelum MB':>11} {'sesudah MB':>11}")
+    for col, info in report['columns'].items():
+        print(f"{col:<20} {info['dtype']:<18} {info['before_mb']:>11.1f} {info['after_mb']:>11.1f}")
+    print(f"\n{args.rows} baris: {report['before_mb']:.1f} MB -> {report['after_mb']:.1f} MB "
+          f"({report['ratio']:.1f}x lebih kecil, konversi {elapsed:.2f}s)")
+
+if __name__ == '__main__':
+    main()
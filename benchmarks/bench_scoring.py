@@ -0,0 +1,63 @@
+"""
+Benchmark skoring Likert: jalur lama (Series.apply per sel) vs scoring.score_responses.
+
+    python benchmarks/bench_scoring.py [--sizes 10000 100000 1000000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from scoring import QUESTION_SCALES, SCORE_COLUMNS, score_responses
+
+def map_sentiment_score(val):
+    """Salinan mapping lama dari pages/admin.py (dibangun ulang tiap panggilan)."""
+    mapping = {
+        'Sangat Mudah': 5, 'Mudah': 4, 'Biasa': 3, 'Sulit': 2, 'Sangat Sulit': 1,
+        'Sangat Puas': 5, 'Puas': 4, 'Kecewa': 2, 'Sangat Kecewa': 1,
+        'Sangat Intuitif': 5, 'Cukup Jelas': 3, 'Membingungkan': 1,
+        'Cepat': 5, 'Lambat': 1
+    }
+    return mapping.get(val, 3)
+
+def legacy_scores(df):
+    scored = df.copy()
+    for question, score_col in SCORE_COLUMNS.items():
+        scored[score_col] = scored[question].apply(map_sentiment_score)
+    return scored
+
+def make_frame(n, seed=0):
+    rng = np.random.default_rng(seed)
+    data = {}
+    for question, scale in QUESTION_SCALES.items():
+        labels = np.array(list(scale) + [None], dtype=object)
+        data[question] = labels[rng.integers(0, len(labels), n)]
+    return pd.DataFrame(data)
+
+def best_of(fn, df, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(df)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'rows':>10} {'apply (s)':>12} {'vectorized (s)':>15} {'speedup':>9}")
+    for n in args.sizes:
+        df = make_frame(n)
+        old = best_of(legacy_scores, df, args.repeat)
+        new = best_of(score_responses, df, args.repeat)
+        print(f"{n:>10} {old:>12.4f} {new:>15.4f} {old / new:>8.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""
+Waktu cold start: render pertama halaman intro survei (app.py) dan halaman
+login admin (pages/admin.py), plus import termahal selama render itu
+(diukur dengan `python -X importtime`). Tiap sampel memakai proses baru.
+
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --baseline HEAD~1 --repeat 5
+
+--baseline REF mengukur juga tree pada commit REF (lewat git worktree
+sementara) untuk perbandingan sebelum/sesudah.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TARGETS = {"intro": "app.py", "admin-login": os.path.join("pages", "admin.py")}
+MARKER = "--- render ---"
+
+# Dijalankan di proses anak: import harness dulu, lalu tandai awal render
+# di stderr supaya baris importtime milik harness bisa dibuang.
+CHILD = f"""
+import sys, time
+from streamlit.testing.v1 import AppTest
+sys.path.insert(0, sys.argv[1])
+at = AppTest.from_file(sys.argv[2], default_timeout=120)
+print({MARKER!r}, file=sys.stderr, flush=True)
+start = time.perf_counter()
+at.run()
+elapsed = time.perf_counter() - start
+if at.exception:
+    raise SystemExit(str(at.exception[0].value))
+print(elapsed)
+"""
+
+def measure_once(root, script, workdir):
+    env = dict(os.environ, SUPABASE_URL="https://bench.supabase.co", SUPABASE_KEY="bench",
+               SURVEY_JOURNAL=os.path.join(workdir, "survey_journal.jsonl"))
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", CHILD, root, os.path.join(root, script)],
+                          cwd=workdir, env=env, capture_output=True, text=True, check=True)
+    render_s = float(proc.stdout.strip().splitlines()[-1])
+
+    imports = {}
+    after_marker = False
+    for line in proc.stderr.splitlines():
+        if line.startswith(MARKER):
+            after_marker = True
+            continue
+        if not after_marker or not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit() and not name.startswith("  "):  # hanya import level atas
+            imports[name.strip()] = int(cumulative) / 1e6
+    return render_s, imports
+
+def measure(root, repeat):
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="survey-startup-") as workdir:
+        for label, script in TARGETS.items():
+            samples, imports = [], {}
+            for _ in range(repeat):
+                render_s, imports = measure_once(root, script, workdir)
+                samples.append(render_s)
+            top = sorted(imports.items(), key=lambda item: -item[1])[:8]
+            results[label] = {
+                "first_render_s": statistics.median(samples),
+                "import_s": sum(imports.values()),
+                "top_imports": [{"module": m, "s": round(s, 4)} for m, s in top],
+            }
+    return results
+
+def print_results(title, results):
+    print(f"\n== {title}")
+    for label, result in results.items():
+        print(f"{label:<12} render pertama {result['first_render_s']:.3f}s · import saat render {result['import_s']:.3f}s")
+        for item in result["top_imports"]:
+            print(f"    {item['module']:<32} {item['s']:.3f}s")
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--baseline", help="commit pembanding, misalnya HEAD~1")
+    parser.add_argument("--output", help="simpan hasil sebagai JSON")
+    args = parser.parse_args()
+
+    report = {"current": measure(ROOT, args.repeat)}
+    if args.baseline:
+        worktree = tempfile.mkdtemp(prefix="survey-baseline-")
+        subprocess.run(["git", "-C", ROOT, "worktree", "add", "--detach", worktree, args.baseline],
+                       check=True, capture_output=True)
+        try:
+            report["baseline"] = measure(worktree, args.repeat)
+        finally:
+            subprocess.run(["git", "-C", ROOT, "worktree", "remove", "--force", worktree], check=True)
+        print_results(f"baseline ({args.baseline})", report["baseline"])
+    print_results("current", report["current"])
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+if __name__ == "__main__":
+    main()
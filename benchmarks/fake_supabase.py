@@ -0,0 +1,100 @@
+"""
+Stand-in Supabase client di memori untuk benchmark: mendukung subset query
+builder yang dipakai supabase_manager (select dengan data->>kolom, order,
+limit, gt pada id, gte/lt pada timestamp, insert) dan latensi jaringan
+buatan per request.
+"""
+import bisect
+import threading
+import time
+
+class _Result:
+    def __init__(self, data):
+        self.data = data
+
+class _Query:
+    def __init__(self, client):
+        self.client = client
+        self.columns = "*"
+        self.limit_n = None
+        self.after = None
+        self.start = None
+        self.end = None
+        self.payload = None
+
+    def select(self, columns="*", **kwargs):
+        self.columns = columns
+        return self
+
+    def order(self, *args, **kwargs):
+        return self  # baris selalu disimpan urut id
+
+    def limit(self, n):
+        self.limit_n = n
+        return self
+
+    def gt(self, column, value):
+        self.after = value  # hanya keyset pada id
+        return self
+
+    def gte(self, column, value):
+        self.start = value
+        return self
+
+    def lt(self, column, value):
+        self.end = value
+        return self
+
+    def insert(self, payload):
+        self.payload = payload if isinstance(payload, list) else [payload]
+        return self
+
+    def _project(self, row):
+        if self.columns in ("*", "id,timestamp,data"):
+            return row
+        out = {}
+        for col in self.columns.split(","):
+            if "->>" in col:
+                alias, path = col.split(":")
+                out[alias] = (row["data"] or {}).get(path.split("->>")[1])
+            else:
+                out[col] = row[col]
+        return out
+
+    def execute(self):
+        client = self.client
+        if client.latency:
+            time.sleep(client.latency)
+        with client.lock:
+            if self.payload is not None:
+                client.requests += 1
+                for item in self.payload:
+                    client.next_id += 1
+                    row = {"id": client.next_id, "timestamp": item["timestamp"], "data": item["data"]}
+                    client.keys.append(row["id"])
+                    client.rows.append(row)
+                return _Result(self.payload)
+
+            start = bisect.bisect_right(client.keys, self.after) if self.after else 0
+            if self.start or self.end:
+                rows = [r for r in client.rows[start:]
+                        if (not self.start or r["timestamp"] >= self.start)
+                        and (not self.end or r["timestamp"] < self.end)]
+            else:
+                end = len(client.rows) if self.limit_n is None else start + self.limit_n
+                rows = client.rows[start:end]
+            if self.limit_n is not None:
+                rows = rows[:self.limit_n]
+            return _Result([self._project(row) for row in rows])
+
+class FakeSupabase:
+    def __init__(self, rows=None, latency=0.0):
+        self.lock = threading.Lock()
+        self.latency = latency
+        self.requests = 0
+        self.rows = sorted(rows or [], key=lambda r: r["id"])
+        self.keys = [r["id"] for r in self.rows]
+        self.next_id = max((r["id"] for r in self.rows), default=0)
+
+    def table(self, name):
+        return _Query(self)
@@ -0,0 +1,56 @@
+"""Generator respon survei sintetis dengan skema yang sama seperti app.py (page_1 s/d page_5)."""
+import numpy as np
+import pandas as pd
+
+from scoring import QUESTION_SCALES
+
+COMPETITORS = ['GoPay', 'OVO', 'DANA', 'ShopeePay', 'LinkAja', 'Lainnya']
+INTENTIONS = ['Ya, Pasti', 'Mungkin', 'Tidak']
+FEEDBACK_SNIPPETS = [
+    '', 'Top up cepat dan mudah', 'Nomor VA susah disalin', 'Transfer lancar tanpa kendala',
+    'Loading agak lambat saat konfirmasi', 'Split bill membingungkan di awal',
+    'Shared wallet sangat membantu untuk keluarga', 'Tolong tambah fitur paylater',
+    'Tampilan bersih, warna oranye menarik', 'Notifikasi transaksi kadang telat muncul',
+    'Semangat tim developer!', 'Perlu cashback dan promo seperti GoPay',
+]
+FEEDBACK_KEYS = ['topup_feedback', 'transfer_feedback', 'split_feedback',
+                 'shared_feedback', 'kompetitor_fitur', 'pesan_akhir']
+
+def make_frame(n: int, seed: int = 0) -> pd.DataFrame:
+    """n respon lengkap sebagai DataFrame (kolom sama dengan hasil fetch_all_responses)."""
+    rng = np.random.default_rng(seed)
+    anon = rng.random(n) < 0.3
+    ids = np.arange(n)
+    data = {
+        'nama': np.where(anon, 'Anonim', np.char.add('Responden ', ids.astype(str))),
+        'email': np.where(anon, '-', np.char.add(np.char.add('user', ids.astype(str)), '@example.com')),
+        'anonim': np.where(anon, 'Ya', 'Tidak'),
+    }
+    for question, scale in QUESTION_SCALES.items():
+        labels = np.array(list(scale), dtype=object)
+        data[question] = labels[rng.integers(0, len(labels), n)]
+    snippets = np.array(FEEDBACK_SNIPPETS, dtype=object)
+    for key in FEEDBACK_KEYS:
+        data[key] = snippets[rng.integers(0, len(snippets), n)]
+    data['kompetitor_nama'] = np.array(COMPETITORS, dtype=object)[rng.integers(0, len(COMPETITORS), n)]
+    data['niat_penggunaan'] = np.array(INTENTIONS, dtype=object)[rng.integers(0, len(INTENTIONS), n)]
+
+    start = np.datetime64('2025-01-01T00:00:00')
+    offsets = np.sort(rng.integers(0, 90 * 24 * 3600, n)).astype('timedelta64[s]')
+    frame = pd.DataFrame(data)
+    frame['timestamp'] = np.datetime_as_string(start + offsets, unit='s')
+    return frame
+
+def make_records(n: int, seed: int = 0) -> list:
+    """n respon sebagai dict (payload `data` yang dikirim save_survey_response)."""
+    frame = make_frame(n, seed).drop(columns=['timestamp'])
+    return frame.to_dict('records')
+
+def make_rows(n: int, seed: int = 0) -> list:
+    """n baris tabel survey_responses (id, timestamp, data) seperti yang dikembalikan Supabase."""
+    frame = make_frame(n, seed)
+    timestamps = frame.pop('timestamp').tolist()
+    return [
+        {'id': i + 1, 'timestamp': ts, 'data': record}
+        for i, (ts, record) in enumerate(zip(timestamps, frame.to_dict('records')))
+    ]
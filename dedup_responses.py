@@ -0,0 +1,106 @@
+"""
+Dedup satu kali atas respon yang sudah tersimpan (sebelum ada idempotency key).
+
+    python dedup_responses.py                 # laporan saja
+    python dedup_responses.py --apply         # hapus duplikat
+    python dedup_responses.py --window 1800   # jendela waktu duplikat (detik)
+
+Dua respon dianggap duplikat jika submission_id-nya sama, atau (untuk data
+lama tanpa submission_id) isi jawabannya identik dan selisih timestamp-nya
+tidak lebih dari --window detik dari respon yang disimpan. Respon paling awal
+yang dipertahankan. Backend mengikuti STORAGE_BACKEND.
+"""
+import argparse
+import math
+
+import pandas as pd
+
+import storage
+from idempotency import SUBMISSION_KEY_FIELD, content_hash
+from shared_state import get_store
+
+DELETE_CHUNK = 500
+
+def _clean(data: dict) -> dict:
+    """Buang nilai kosong (None/NaN) agar hash sama untuk baris JSON dan baris DataFrame."""
+    return {k: v for k, v in data.items() if v is not None and not (isinstance(v, float) and math.isnan(v))}
+
+def find_duplicates(rows, window: float) -> list:
+    """`rows` = iterable (id, timestamp, data) urut timestamp. Return id yang harus dihapus."""
+    kept = {}  # dedup key -> timestamp respon yang dipertahankan
+    duplicates = []
+    for row_id, timestamp, data in rows:
+        data = _clean(data)
+        ts = pd.Timestamp(timestamp)
+        submission_id = data.get(SUBMISSION_KEY_FIELD)
+        key = ("id", submission_id) if submission_id else ("content", content_hash(data))
+        first = kept.get(key)
+        if first is not None and (submission_id or (ts - first).total_seconds() <= window):
+            duplicates.append(row_id)
+        else:
+            kept[key] = ts
+    return duplicates
+
+def _supabase(apply, window):
+    import supabase_manager
+
+    rows = [(row["id"], row["timestamp"], row["data"] or {})
+            for page in supabase_manager._iter_pages() for row in page]
+    rows.sort(key=lambda row: (row[1], row[0]))  # halaman urut id; find_duplicates butuh urut timestamp
+    duplicates = find_duplicates(rows, window)
+    if apply:
+        table = supabase_manager.get_client().table(supabase_manager.TABLE_NAME)
+        for i in range(0, len(duplicates), DELETE_CHUNK):
+            table.delete().in_("id", duplicates[i:i + DELETE_CHUNK]).execute()
+        supabase_manager.clear_shared_snapshot()
+    return duplicates
+
+def _sql(apply, window):
+    backend = storage.get_backend()
+    table = backend.table
+    with backend.engine.connect() as conn:
+        result = conn.execute(table.select().order_by(table.c.timestamp, table.c.id))
+        duplicates = find_duplicates(((r.id, r.timestamp, r.data or {}) for r in result), window)
+    if apply:
+        with backend.engine.begin() as conn:
+            for i in range(0, len(duplicates), DELETE_CHUNK):
+                conn.execute(table.delete().where(table.c.id.in_(duplicates[i:i + DELETE_CHUNK])))
+    return duplicates
+
+def _local(apply, window):
+    import local_db_manager
+
+    found = []
+
+    def dedup(frame):
+        if frame.empty:
+            return None
+        frame = frame.sort_values('timestamp', kind='stable')
+        records = frame.drop(columns=['timestamp']).to_dict('records')
+        found.extend(find_duplicates(zip(frame.index, frame['timestamp'], records), window))
+        if not apply or not found:
+            return None
+        return frame.drop(index=found).reset_index(drop=True)
+
+    # Baca dan tulis ulang dalam satu lock exclusive: append dari worker lain menunggu.
+    local_db_manager.rewrite(dedup)
+    return found
+
+BACKENDS = {"supabase": _supabase, "sql": _sql, "local": _local}
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--apply", action="store_true", help="hapus duplikat (default: laporan saja)")
+    parser.add_argument("--window", type=float, default=600, help="detik; hanya untuk baris tanpa submission_id")
+    args = parser.parse_args()
+
+    duplicates = BACKENDS[storage.STORAGE_BACKEND](args.apply, args.window)
+    print(f"Backend {storage.STORAGE_BACKEND}: {len(duplicates)} respon duplikat ditemukan.")
+    if args.apply and duplicates:
+        get_store().bump("responses")
+        print("Duplikat dihapus. Klik '🔄 Refresh Data' di dashboard admin agar snapshot dimuat ulang penuh.")
+    elif duplicates:
+        print("Jalankan ulang dengan --apply untuk menghapus.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import atexit
+import os
+import secrets
+import threading
+import time
+
+from metrics import counter
+from shared_state import get_store
+
+DRAFT_PREFIX = "draft:"
+DRAFT_TTL = float(os.getenv("DRAFT_TTL_HOURS") or 72) * 3600  # draft lebih tua dari ini dibuang
+FLUSH_INTERVAL = 0.5  # detik; checkpoint dalam jendela ini digabung jadi satu commit
+PURGE_INTERVAL = 3600
+
+def new_token() -> str:
+    return secrets.token_urlsafe(16)
+
+class DraftStore:
+    """
+    Jawaban survei yang belum selesai, per token resume (query param URL).
+    `save` hanya menaruh draft terbaru di memori; thread flusher menulis semua
+    draft yang berubah ke shared store tiap FLUSH_INTERVAL dalam satu commit,
+    jadi checkpoint per halaman hanya biaya dict assignment dan beberapa
+    checkpoint beruntun dari token yang sama cukup ditulis sekali. Tidak
+    menyentuh tabel survey_responses.
+    """
+
+    def __init__(self, store=None, flush_interval=FLUSH_INTERVAL, ttl=DRAFT_TTL):
+        self.store = store or get_store()
+        self.flush_interval = flush_interval
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._pending = {}  # token -> draft, atau None untuk dihapus
+        self._last_purge = 0.0
+
+        atexit.register(self.flush)
+        self._worker = threading.Thread(target=self._run, name="draft-flusher", daemon=True)
+        self._worker.start()
+
+    def save(self, token, page, data):
+        with self._lock:
+            self._pending[token] = {"page": page, "data": dict(data), "updated_at": time.time()}
+
+    def discard(self, token):
+        with self._lock:
+            self._pending[token] = None
+
+    def load(self, token):
+        """Draft {'page', 'data', 'updated_at'} untuk token, atau None jika tidak ada/kedaluwarsa."""
+        with self._lock:
+            if token in self._pending:
+                draft = self._pending[token]
+                return None if draft is None else dict(draft, data=dict(draft["data"]))
+        _, draft = self.store.get(DRAFT_PREFIX + token)
+        if draft is None or time.time() - draft["updated_at"] > self.ttl:
+            return None
+        return draft
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        try:
+            upserts = {DRAFT_PREFIX + token: draft for token, draft in pending.items() if draft is not None}
+            deletes = [DRAFT_PREFIX + token for token, draft in pending.items() if draft is None]
+            if upserts:
+                self.store.set_many(upserts)
+            if deletes:
+                self.store.delete(*deletes)
+        except Exception as e:
+            counter("survey_failures_total", "Kegagalan per komponen").inc(component="drafts")
+            print("Draft flush failed:", e)
+            with self._lock:
+                # Kembalikan, kecuali token yang sudah punya checkpoint lebih baru.
+                for token, draft in pending.items():
+                    self._pending.setdefault(token, draft)
+
+    def purge_expired(self):
+        cutoff = time.time() - self.ttl
+        expired = [key for key, draft in self.store.items(DRAFT_PREFIX) if draft["updated_at"] < cutoff]
+        if expired:
+            self.store.delete(*expired)
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            self.flush()
+            if time.time() - self._last_purge > PURGE_INTERVAL:
+                self._last_purge = time.time()
+                try:
+                    self.purge_expired()
+                except Exception as e:
+                    print("Draft purge failed:", e)
+
+_drafts = None
+_drafts_lock = threading.Lock()
+
+def get_draft_store() -> DraftStore:
+    global _drafts
+    with _drafts_lock:
+        if _drafts is None:
+            _drafts = DraftStore()
+        return _drafts
@@ -0,0 +1,186 @@
+import os
+import smtplib
+import threading
+import time
+from collections import deque
+
+from admission import ADMIT_TIMEOUT, Rejected, get_gate
+from metrics import counter, histogram
+from shared_state import get_store
+
+EMAIL_QUEUE = "email"
+SMTP_TIMEOUT = float(os.getenv("SMTP_TIMEOUT") or 10.0)  # detik per operasi socket SMTP
+# Satu percobaan kirim paling banyak ~12 round trip (connect, EHLO, STARTTLS, EHLO,
+# AUTH, MAIL, RCPT, DATA, isi, ...), masing-masing dibatasi SMTP_TIMEOUT. Lease klaim
+# mencakup antrean gate "smtp" plus satu percobaan dan diperpanjang sebelum konek
+# ulang, jadi worker lain tidak mengambil alih (dan mengirim dua kali) email yang
+# masih dikirim.
+SEND_LEASE = ADMIT_TIMEOUT + 12 * SMTP_TIMEOUT
+
+def _shared_stats(store) -> dict:
+    counts = store.queue_counts(EMAIL_QUEUE)
+    return {
+        "depth": counts["ready"],
+        "retrying": counts["waiting"],
+        "sent": store.get("email.sent", 0)[1],
+        "failed": store.get("email.failed", 0)[1],
+        "latency_last": None,
+        "latency_avg": None,
+        "latency_p95": None,
+    }
+
+class EmailQueue:
+    """
+    Antrian email durable di shared store (dibagi semua worker). `enqueue`
+    langsung kembali; worker thread di tiap proses mengklaim job dari antrian
+    bersama dan mengirim lewat satu koneksi SMTP yang dipakai ulang (STARTTLS +
+    login hanya saat konek), dengan retry exponential backoff untuk kegagalan.
+    Email yang diklaim worker yang mati dikirim ulang worker lain setelah lease habis.
+    Kirim lewat admission gate "smtp": laju dibatasi, dan selama breaker
+    terbuka job ditunda tanpa menambah hitungan percobaan.
+
+    Untuk uji lokal cukup jalankan stand-in SMTP, misalnya
+    `python -m aiosmtpd -n -l localhost:8025`, lalu set starttls=False.
+    """
+
+    def __init__(self, host, port, mail, password, store=None, starttls=True,
+                 max_retries=5, backoff_base=1.0, backoff_max=60.0, idle_timeout=60.0, poll_interval=1.0,
+                 worker=True):
+        self.host = host
+        self.port = port
+        self.mail = mail
+        self.password = password
+        self.store = store or get_store()
+        self.starttls = starttls
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.idle_timeout = idle_timeout
+        self.poll_interval = poll_interval
+
+        self._wake = threading.Event()
+        self._conn = None
+        self._stats_lock = threading.Lock()
+        self._latencies = deque(maxlen=500)
+
+        self._last_used = time.monotonic()
+
+        # worker=False: tanpa thread, job diproses lewat process_next() (mis. di test).
+        self._worker = None
+        if worker:
+            self._worker = threading.Thread(target=self._run, name="email-queue", daemon=True)
+            self._worker.start()
+
+    def enqueue(self, recipient: str, message: str):
+        """Masukkan email (MIME string) ke antrian bersama; tidak menunggu pengiriman."""
+        self.store.push(EMAIL_QUEUE, [{"recipient": recipient, "message": message, "enqueued_at": time.time()}])
+        self._wake.set()
+
+    def stats(self) -> dict:
+        """Kedalaman antrian dan jumlah terkirim/gagal (semua worker), latensi kirim (proses ini, detik)."""
+        stats = _shared_stats(self.store)
+        with self._stats_lock:
+            latencies = sorted(self._latencies)
+            last = self._latencies[-1] if self._latencies else None
+        if latencies:
+            stats.update(
+                latency_last=last,
+                latency_avg=sum(latencies) / len(latencies),
+                latency_p95=latencies[int(0.95 * (len(latencies) - 1))],
+            )
+        return stats
+
+    def _connect(self):
+        conn = smtplib.SMTP(self.host, self.port, timeout=SMTP_TIMEOUT)
+        # has_extn hanya terisi setelah EHLO, dan starttls() mengosongkannya lagi.
+        conn.ehlo()
+        if self.starttls:
+            conn.starttls()
+            conn.ehlo()
+        if conn.has_extn("auth"):
+            conn.login(self.mail, self.password)
+        return conn
+
+    def _close(self):
+        if self._conn is not None:
+            try:
+                self._conn.quit()
+            except Exception:
+                pass
+            self._conn = None
+
+    def _send(self, job_id, recipient, message):
+        if self._conn is None:
+            self._conn = self._connect()
+        try:
+            self._conn.sendmail(self.mail, recipient, message)
+        except smtplib.SMTPServerDisconnected:
+            # Koneksi idle diputus server: konek ulang sekali lalu kirim lagi, dengan lease baru.
+            self.store.extend([job_id], SEND_LEASE)
+            self._conn = self._connect()
+            self._conn.sendmail(self.mail, recipient, message)
+        return True
+
+    def process_next(self) -> bool:
+        """Klaim dan kirim satu email. False jika antrian kosong."""
+        jobs = self.store.claim(EMAIL_QUEUE, limit=1, lease=SEND_LEASE)
+        if not jobs:
+            if self._conn is not None and time.monotonic() - self._last_used > self.idle_timeout:
+                self._close()
+            return False
+
+        job_id, item, attempt = jobs[0]
+        recipient = item["recipient"]
+        try:
+            send_start = time.perf_counter()
+            get_gate("smtp").run(lambda: self._send(job_id, recipient, item["message"]))
+            histogram("survey_smtp_send_seconds", "Durasi satu kirim SMTP").observe(time.perf_counter() - send_start)
+            counter("survey_emails_total", "Email per hasil").inc(result="sent")
+            self.store.ack([job_id])
+            self.store.incr("email.sent")
+            with self._stats_lock:
+                self._latencies.append(time.time() - item["enqueued_at"])
+        except Rejected:
+            # Rate limit / breaker SMTP terbuka: tunda tanpa menghabiskan jatah retry.
+            delay = max(get_gate("smtp").breaker.retry_after(), self.poll_interval)
+            self.store.release([job_id], delay=delay)
+        except Exception as e:
+            self._close()
+            if attempt + 1 >= self.max_retries:
+                counter("survey_failures_total", "Kegagalan per komponen").inc(component="smtp")
+                counter("survey_emails_total", "Email per hasil").inc(result="failed")
+                print(f"Email ke {recipient} gagal setelah {attempt + 1} percobaan: {e}")
+                self.store.ack([job_id])
+                self.store.incr("email.failed")
+            else:
+                counter("survey_emails_total", "Email per hasil").inc(result="retry")
+                delay = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+                self.store.release([job_id], delay=delay, count_attempt=True)
+        self._last_used = time.monotonic()
+        return True
+
+    def _run(self):
+        while True:
+            if not self.process_next():
+                self._wake.wait(timeout=self.poll_interval)
+                self._wake.clear()
+
+_default_queue = None
+_default_lock = threading.Lock()
+
+def get_email_queue(config: dict, starttls: bool = True) -> EmailQueue:
+    """Queue tunggal per proses, dibuat saat pertama dipakai dari SMTP_CONFIG."""
+    global _default_queue
+    with _default_lock:
+        if _default_queue is None:
+            _default_queue = EmailQueue(
+                config["HOST"], config["PORT"], config["MAIL"], config["PASSWORD"],
+                starttls=starttls,
+            )
+        return _default_queue
+
+def queue_stats() -> dict:
+    """Statistik antrian bersama; latensi hanya tersedia jika proses ini punya worker email."""
+    if _default_queue is not None:
+        return _default_queue.stats()
+    return _shared_stats(get_store())
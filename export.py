@@ -0,0 +1,59 @@
+import gzip
+import os
+import tempfile
+
+from storage import iter_responses
+
+# Label format -> (ekstensi file, MIME type)
+EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv"),
+    "CSV (gzip)": ("csv.gz", "application/gzip"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+def _write_csv(chunks, f):
+    header = True
+    for chunk in chunks:
+        chunk.to_csv(f, index=False, header=header)
+        header = False
+
+def _write_parquet(chunks, path, columns):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    # Semua kolom disimpan sebagai string agar skema antar chunk selalu sama.
+    schema = pa.schema([(c, pa.string()) for c in columns])
+    with pq.ParquetWriter(path, schema) as writer:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk.astype("string"), schema=schema, preserve_index=False)
+            writer.write_table(table)
+
+def export_responses(fmt, columns, start=None, end=None):
+    """
+    Tulis export chunk demi chunk langsung dari backend (memori tetap sebesar
+    satu chunk saat menulis) ke file sementara, lalu baca hasilnya. File
+    sementara selalu dihapus. Return (bytes, jumlah baris).
+    `start`/`end` adalah batas timestamp ISO [start, end).
+    """
+    columns = list(columns)
+    suffix = EXPORT_FORMATS[fmt][0]
+    row_count = 0
+
+    def chunks():
+        nonlocal row_count
+        for chunk in iter_responses(columns, start, end):
+            row_count += len(chunk)
+            yield chunk.reindex(columns=columns)
+
+    with tempfile.TemporaryDirectory(prefix="hasil_survei_") as tmp_dir:
+        path = os.path.join(tmp_dir, "export." + suffix)
+        if fmt == "CSV":
+            with open(path, "w", encoding="utf-8", newline="") as f:
+                _write_csv(chunks(), f)
+        elif fmt == "CSV (gzip)":
+            with gzip.open(path, "wt", encoding="utf-8", newline="") as f:
+                _write_csv(chunks(), f)
+        else:
+            _write_parquet(chunks(), path, columns)
+        with open(path, "rb") as f:
+            return f.read(), row_count
@@ -0,0 +1,37 @@
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: tanpa file lock antar proses
+    fcntl = None
+
+# False di platform tanpa flock: file_lock selalu "berhasil" tanpa mengunci apa pun,
+# jadi pemanggil tidak boleh mengandalkannya untuk eksklusivitas antar proses.
+LOCKING = fcntl is not None
+
+@contextmanager
+def file_lock(path, exclusive=True, blocking=True):
+    """
+    flock pada `path` (dibuat jika belum ada) selama blok berjalan. Yield True
+    jika lock didapat, False jika `blocking=False` dan proses lain memegangnya.
+    Lock dilepas saat blok selesai. flock tidak reentrant: membuka path yang
+    sama dua kali di satu proses bisa saling menunggu.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "a") as lock_file:
+        if not LOCKING:
+            yield True
+            return
+        mode = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+        if not blocking:
+            mode |= fcntl.LOCK_NB
+        try:
+            fcntl.flock(lock_file, mode)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
@@ -0,0 +1,67 @@
+import hashlib
+import json
+import threading
+
+from shared_state import get_store
+
+SUBMISSION_KEY_FIELD = 'submission_id'
+VOLATILE_FIELDS = {'timestamp', SUBMISSION_KEY_FIELD, 'schema_version'}  # tidak ikut content hash
+
+def content_hash(data: dict) -> str:
+    """Hash jawaban (JSON dengan key terurut), tanpa field yang berubah tiap submit."""
+    canonical = json.dumps({k: v for k, v in data.items() if k not in VOLATILE_FIELDS},
+                           sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+def submission_key(session_id: str, data: dict) -> str:
+    """Idempotency key submit: session id + content hash jawaban."""
+    return hashlib.sha256(f"{session_id}:{content_hash(data)}".encode()).hexdigest()[:32]
+
+class SubmissionIndex:
+    """
+    Himpunan idempotency key yang sudah disimpan. Pengecekan pertama lewat set
+    di memori (O(1)); key baru didaftarkan atomik ke tabel unique_keys di shared
+    store, yang sekaligus menjadi snapshot persisten untuk worker lain dan
+    untuk proses yang baru start. Key yang tidak ada di set dicek ke tabel
+    bersama, jadi key yang didaftarkan worker lain setelah start tetap terlihat.
+    """
+
+    def __init__(self, store=None, namespace="submissions"):
+        self.store = store or get_store()
+        self.namespace = namespace
+        self._lock = threading.Lock()
+        self._seen = set(self.store.unique_keys(namespace))
+
+    def __contains__(self, key):
+        if key in self._seen:
+            return True
+        if self.store.has_unique(self.namespace, key):
+            with self._lock:
+                self._seen.add(key)
+            return True
+        return False
+
+    def claim(self, key) -> bool:
+        """Daftarkan key. False jika key sudah pernah diklaim (duplikat)."""
+        with self._lock:
+            if key in self._seen:
+                return False
+            added = self.store.add_unique(self.namespace, key)
+            self._seen.add(key)
+            return added
+
+    def release(self, key):
+        """Lepas key setelah penyimpanan gagal, agar submit ulang tidak dianggap duplikat."""
+        with self._lock:
+            self._seen.discard(key)
+            self.store.discard_unique(self.namespace, key)
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_submission_index() -> SubmissionIndex:
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = SubmissionIndex()
+        return _index
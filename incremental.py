@@ -0,0 +1,124 @@
+import threading
+import weakref
+
+import numpy as np
+import pandas as pd
+
+from idempotency import SUBMISSION_KEY_FIELD
+from schema import FREE_TEXT_COLUMNS
+from shared_state import get_store
+
+def response_ids(df: pd.DataFrame) -> pd.Series:
+    """submission_id jika ada; selain itu hash timestamp + isi teks bebas (stabil antar refresh dan antar proses)."""
+    if SUBMISSION_KEY_FIELD in df.columns:
+        ids = df[SUBMISSION_KEY_FIELD].astype(object)
+    else:
+        ids = pd.Series(None, index=df.index, dtype=object)
+    missing = ids.isna().to_numpy()
+    if missing.any():
+        basis = ['timestamp'] + [field for field in FREE_TEXT_COLUMNS if field in df.columns]
+        # Hash per kolom (vektor) dengan key tetap pandas, jadi hasilnya sama di semua proses.
+        hashed = pd.util.hash_pandas_object(df.loc[missing, basis], index=False).to_numpy()
+        ids = ids.copy()
+        ids[missing] = [f"{h:016x}" for h in hashed]
+    return ids
+
+# Frame dashboard dibagi read-only antar rerun dan antar agregat (cache_resource),
+# jadi key frame terakhir di-cache per objek frame.
+_keys_cache = {"frame": None, "keys": None}
+_keys_lock = threading.Lock()
+
+def row_keys(df: pd.DataFrame) -> np.ndarray:
+    """Key uint64 unik per baris: hash response id, ditambah urutan kemunculan untuk baris kembar."""
+    with _keys_lock:
+        frame, keys = _keys_cache["frame"], _keys_cache["keys"]
+        if frame is not None and frame() is df and len(keys) == len(df):
+            return keys
+    keys = pd.util.hash_array(response_ids(df).to_numpy(object))
+    repeated = pd.Series(keys)
+    if repeated.duplicated().any():
+        keys = keys + repeated.groupby(keys).cumcount().to_numpy(np.uint64)
+    with _keys_lock:
+        _keys_cache.update(frame=weakref.ref(df), keys=keys)
+    return keys
+
+class IncrementalAggregate:
+    """
+    Dasar agregat aditif atas baris respon yang hanya diperbarui untuk baris
+    baru. Baris dikenali lewat key stabil (submission_id atau hash isinya,
+    lihat row_keys), bukan posisinya: urutan frame boleh berubah (segment local
+    per proses, baris telat dari replay/flush) tanpa membangun ulang. Jika ada
+    baris yang sudah dihitung tidak lagi ada di frame (dihapus, dedup), agregat
+    dibangun ulang. Dengan `key`, state disimpan di shared store dan state yang
+    sudah diperbarui worker lain dipakai apa adanya.
+
+    Subclass mengisi `_clear` (agregat kosong), `_add` (tambahkan baris baru,
+    return jumlah baris yang diproses), serta `_dump`/`_restore` jika state
+    disimpan di shared store.
+    """
+
+    def __init__(self, store=None, key=None):
+        self.store = store or get_store()
+        self.key = key
+        self._lock = threading.Lock()
+        self._stored_version = None
+        self._seen = np.empty(0, dtype=np.uint64)  # row key yang sudah dihitung, terurut
+        self._clear()
+        self._load()
+
+    @property
+    def rows_seen(self) -> int:
+        return len(self._seen)
+
+    def _clear(self):
+        raise NotImplementedError
+
+    def _add(self, rows: pd.DataFrame) -> int:
+        raise NotImplementedError
+
+    def _dump(self):
+        raise NotImplementedError
+
+    def _restore(self, state):
+        raise NotImplementedError
+
+    def _reset(self):
+        self._seen = np.empty(0, dtype=np.uint64)
+        self._clear()
+
+    def _load(self):
+        """Ambil state dari shared store jika versinya berbeda dari milik proses ini."""
+        if self.key is None or self.store.version(self.key) in (None, self._stored_version):
+            return
+        try:
+            version, state = self.store.get(self.key)
+            self._restore(state["aggregate"])
+            self._seen = np.frombuffer(state["seen"], dtype=np.uint64)
+            self._stored_version = version
+        except Exception as e:
+            print(f"State {self.key} rusak, dibangun ulang:", e)
+            self._reset()
+
+    def _save(self):
+        if self.key is not None:
+            self._stored_version = self.store.set(self.key, {"seen": self._seen.tobytes(), "aggregate": self._dump()})
+
+    def update(self, df) -> int:
+        """Tambahkan baris df yang belum pernah dilihat. Return hasil `_add` (0 jika tidak ada baris baru)."""
+        with self._lock:
+            if df.empty or 'timestamp' not in df.columns:
+                return 0
+            self._load()
+            keys = row_keys(df)
+            seen = np.isin(keys, self._seen)
+            if seen.sum() < len(self._seen):
+                # Agregat tidak bisa dikurangi per baris: baris yang hilang berarti hitung ulang semua.
+                self._reset()
+                seen[:] = False
+            new = ~seen
+            if not new.any():
+                return 0
+            processed = self._add(df[new])
+            self._seen = np.union1d(self._seen, keys[new])
+            self._save()
+            return processed
@@ -1,37 +1,230 @@
 import pandas as pd
+import json
 import os
+import threading
+import time
 from datetime import datetime
 
-CSV_FILE = "survey_results.csv"
+import pyarrow.parquet as pq
 
-def save_survey_response(data: dict) -> bool:
+from file_lock import file_lock
+
+CSV_FILE = "survey_results.csv"  # format lama, diimpor sekali ke store baru
+STORE_DIR = os.getenv("LOCAL_STORE_DIR") or "survey_store"
+SEGMENT_MAX_ROWS = 500   # segment ditutup & dikompaksi setelah sekian baris
+MAX_PARTS = 8            # part parquet digabung jika melebihi jumlah ini
+
+# Layout store:
+#   STORE_DIR/store.lock                  flock: shared untuk baca/tulis, exclusive untuk kompaksi
+#   STORE_DIR/segments/<ns>-<pid>.jsonl   segment append-only per proses (1 JSON per baris)
+#   STORE_DIR/parts/part-<ns>.parquet     hasil kompaksi, immutable
+_SEGMENT_DIR = os.path.join(STORE_DIR, "segments")
+_PART_DIR = os.path.join(STORE_DIR, "parts")
+_LOCK_FILE = os.path.join(STORE_DIR, "store.lock")
+
+_writer_lock = threading.Lock()
+_segment = {"path": None, "rows": 0}
+
+def _store_lock(exclusive=False, blocking=True):
+    """Yield True jika lock didapat. Non-blocking exclusive dipakai kompaksi oportunistik."""
+    os.makedirs(_SEGMENT_DIR, exist_ok=True)
+    os.makedirs(_PART_DIR, exist_ok=True)
+    return file_lock(_LOCK_FILE, exclusive=exclusive, blocking=blocking)
+
+def _new_segment_path():
+    # Waktu dulu baru pid: segment baru dari proses mana pun selalu berada di akhir urutan,
+    # jadi pembaca posisional (wordfreq, rollups) melihat baris lama di posisi yang sama.
+    return os.path.join(_SEGMENT_DIR, f"{time.time_ns()}-{os.getpid()}.jsonl")
+
+def _file_order(name):
+    """Urutkan menurut waktu dibuat; nama segment lama (<pid>-<ns>) ikut diurutkan menurut ns-nya."""
+    stem = name.rsplit(".", 1)[0]
+    numbers = [int(part) for part in stem.split("-") if part.isdigit()]
+    return (max(numbers, default=0), name)
+
+def _list_files(directory, suffix):
+    if not os.path.isdir(directory):
+        return []
+    names = sorted((name for name in os.listdir(directory) if name.endswith(suffix)), key=_file_order)
+    return [os.path.join(directory, name) for name in names]
+
+def _read_segment(path):
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                pass  # baris terpotong dari writer yang mati di tengah append
+    return records
+
+def append_records(records: list):
     """
-    Menyimpan data survei ke file CSV lokal.
-    Jika file belum ada, akan dibuat baru.
-    Jika sudah ada, data akan ditambahkan (append).
+    Menambahkan respon (dict, sudah berisi timestamp) ke segment append-only
+    milik proses ini. Kolom baru boleh muncul kapan saja; skema digabung saat
+    dibaca. Raise jika gagal.
     """
+    lines = "".join(json.dumps(record, ensure_ascii=False, default=str) + "\n" for record in records)
+    with _writer_lock:
+        if _segment["path"] is None or _segment["rows"] >= SEGMENT_MAX_ROWS:
+            _segment["path"] = _new_segment_path()
+            _segment["rows"] = 0
+        with _store_lock():
+            with open(_segment["path"], "a", encoding="utf-8") as f:
+                f.write(lines)
+        _segment["rows"] += len(records)
+        sealed = _segment["rows"] >= SEGMENT_MAX_ROWS
+
+    if sealed:
+        compact(blocking=False)
+
+def save_survey_response(data: dict) -> bool:
+    """Menambahkan satu respon dengan timestamp sekarang."""
     try:
-        data['timestamp'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        
-        df_new = pd.DataFrame([data])
-        
-        if not os.path.exists(CSV_FILE):
-            df_new.to_csv(CSV_FILE, index=False)
-        else:
-            df_new.to_csv(CSV_FILE, mode='a', header=False, index=False)
-            
+        append_records([dict(data, timestamp=datetime.utcnow().isoformat())])
         return True
     except Exception as e:
-        print(f"Error saving to CSV: {e}")
+        print(f"Error saving to local store: {e}")
         return False
 
-def fetch_all_responses() -> pd.DataFrame:
-    """Membaca semua data dari file CSV lokal."""
+def compact(blocking=True) -> bool:
+    """
+    Gabungkan semua segment (dan part kecil jika terlalu banyak) menjadi satu
+    part Parquet baru. Aman dijalankan dari proses mana pun; writer lain
+    menunggu selama kompaksi berjalan.
+    """
+    with _store_lock(exclusive=True, blocking=blocking) as locked:
+        if not locked:
+            return False
+        _import_legacy_csv()
+
+        segments = _list_files(_SEGMENT_DIR, ".jsonl")
+        parts = _list_files(_PART_DIR, ".parquet")
+        merge_parts = parts if len(parts) >= MAX_PARTS else []
+        if not segments and not merge_parts:
+            return True
+
+        frames = [pd.read_parquet(path) for path in merge_parts]
+        records = [record for path in segments for record in _read_segment(path)]
+        if records:
+            frames.append(pd.DataFrame(records))
+        frames = [frame for frame in frames if not frame.empty]
+
+        if frames:
+            merged = pd.concat(frames, ignore_index=True)
+            tmp_path = os.path.join(_PART_DIR, f".part-{time.time_ns()}.tmp")
+            merged.to_parquet(tmp_path, index=False)
+            os.replace(tmp_path, os.path.join(_PART_DIR, f"part-{time.time_ns()}.parquet"))
+
+        for path in segments + merge_parts:
+            os.remove(path)
+        return True
+
+def _replace_files(frame: pd.DataFrame):
+    """Ganti semua segment dan part dengan `frame` (dipanggil di bawah lock exclusive)."""
+    old_files = _list_files(_SEGMENT_DIR, ".jsonl") + _list_files(_PART_DIR, ".parquet")
+    if not frame.empty:
+        tmp_path = os.path.join(_PART_DIR, f".part-{time.time_ns()}.tmp")
+        frame.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, os.path.join(_PART_DIR, f"part-{time.time_ns()}.parquet"))
+    for path in old_files:
+        os.remove(path)
+
+def rewrite(fn):
+    """
+    Baca seluruh store lalu ganti isinya dengan `fn(frame)` dalam satu lock
+    exclusive, jadi respon yang di-append worker lain tidak hilang di antara
+    baca dan tulis. `fn` mengembalikan None jika store tidak perlu diubah.
+    Dipakai maintenance seperti dedup_responses.py. Return hasil `fn`.
+    """
+    with _store_lock(exclusive=True):
+        _import_legacy_csv()
+        result = fn(_read_frame())
+        if result is not None:
+            _replace_files(result)
+        return result
+
+def _import_legacy_csv():
+    """Pindahkan survey_results.csv format lama ke store (dipanggil di bawah lock exclusive)."""
+    if not os.path.exists(CSV_FILE):
+        return
+    legacy = pd.read_csv(CSV_FILE, dtype=str)
+    if not legacy.empty:
+        legacy.to_parquet(os.path.join(_PART_DIR, f"part-{time.time_ns()}.parquet"), index=False)
+    os.replace(CSV_FILE, CSV_FILE + ".imported")
+
+def _read_frame(columns=None) -> pd.DataFrame:
+    """Baca part dan segment menjadi satu frame (pemanggil memegang lock store)."""
+    frames = []
+    for path in _list_files(_PART_DIR, ".parquet"):
+        if columns is None:
+            frames.append(pd.read_parquet(path))
+        else:
+            available = set(pq.read_schema(path).names)
+            frames.append(pd.read_parquet(path, columns=[c for c in columns if c in available]))
+
+    records = [record for path in _list_files(_SEGMENT_DIR, ".jsonl") for record in _read_segment(path)]
+    if records:
+        frame = pd.DataFrame(records)
+        if columns is not None:
+            frame = frame[[c for c in columns if c in frame.columns]]
+        frames.append(frame)
+
+    frames = [frame for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame() # Kembalikan tabel kosong jika store belum ada
+    return pd.concat(frames, ignore_index=True)
+
+def fetch_all_responses(columns=None) -> pd.DataFrame:
+    """
+    Membaca semua respon dari store lokal. `columns` membatasi kolom yang dibaca
+    (projection); part Parquet hanya membaca kolom tersebut dari disk.
+    """
     try:
         if os.path.exists(CSV_FILE):
-            return pd.read_csv(CSV_FILE)
-        else:
-            return pd.DataFrame() # Kembalikan tabel kosong jika file belum ada
+            compact()
+        with _store_lock():
+            return _read_frame(columns)
     except Exception as e:
-        print(f"Error reading CSV: {e}")
-        return pd.DataFrame()
\ No newline at end of file
+        print(f"Error reading local store: {e}")
+        return pd.DataFrame()
+
+def _filter_chunk(frame, columns, start, end):
+    if (start or end) and 'timestamp' in frame.columns:
+        ts = frame['timestamp'].astype(str)
+        mask = pd.Series(True, index=frame.index)
+        if start:
+            mask &= ts >= start
+        if end:
+            mask &= ts < end
+        frame = frame[mask]
+    if columns is not None:
+        frame = frame.reindex(columns=columns)
+    return frame
+
+def iter_responses(columns=None, start=None, end=None, chunk_size=10000):
+    """
+    Yield respon per chunk DataFrame (untuk export). Part Parquet dibaca per
+    record batch dengan projection, jadi memori tetap sebesar satu chunk.
+    Lock shared ditahan selama iterasi agar kompaksi tidak menghapus file.
+    """
+    with _store_lock():
+        for path in _list_files(_PART_DIR, ".parquet"):
+            parquet_file = pq.ParquetFile(path)
+            read_cols = None
+            if columns is not None:
+                available = set(parquet_file.schema_arrow.names)
+                read_cols = [c for c in columns if c in available]
+                if (start or end) and 'timestamp' in available and 'timestamp' not in read_cols:
+                    read_cols.append('timestamp')
+            for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=read_cols):
+                frame = _filter_chunk(batch.to_pandas(), columns, start, end)
+                if not frame.empty:
+                    yield frame
+
+        for path in _list_files(_SEGMENT_DIR, ".jsonl"):
+            records = _read_segment(path)
+            for i in range(0, len(records), chunk_size):
+                frame = _filter_chunk(pd.DataFrame(records[i:i + chunk_size]), columns, start, end)
+                if not frame.empty:
+                    yield frame
@@ -0,0 +1,203 @@
+import cProfile
+import io
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+METRICS_FILE = os.getenv("METRICS_FILE")              # opt-in: tulis text Prometheus ke file
+METRICS_FILE_INTERVAL = float(os.getenv("METRICS_FILE_INTERVAL") or 15)
+METRICS_PORT = os.getenv("METRICS_PORT")              # opt-in: HTTP GET /metrics
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+def _format_labels(key):
+    if not key:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in key) + "}"
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help = help_text
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, amount=1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help_text, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(buckets)
+        self._lock = threading.Lock()
+        self._values = {}  # label key -> [bucket counts..., sum, count]
+
+    def observe(self, value, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            state = self._values.setdefault(key, [0] * len(self.buckets) + [0.0, 0])
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[i] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    def samples(self):
+        out = []
+        with self._lock:
+            for key, state in self._values.items():
+                for bound, n in zip(self.buckets, state):
+                    out.append((self.name + "_bucket", key + (("le", repr(bound)),), n))
+                out.append((self.name + "_bucket", key + (("le", "+Inf"),), state[-1]))
+                out.append((self.name + "_sum", key, state[-2]))
+                out.append((self.name + "_count", key, state[-1]))
+        return out
+
+_registry = {}
+_registry_lock = threading.Lock()
+
+def _get_or_create(cls, name, help_text, **kwargs):
+    with _registry_lock:
+        if name not in _registry:
+            _registry[name] = cls(name, help_text, **kwargs)
+        return _registry[name]
+
+def counter(name, help_text="") -> Counter:
+    return _get_or_create(Counter, name, help_text)
+
+def histogram(name, help_text="", buckets=DEFAULT_BUCKETS) -> Histogram:
+    return _get_or_create(Histogram, name, help_text, buckets=buckets)
+
+@contextmanager
+def timer(name, help_text="", **labels):
+    """Catat durasi blok (detik) ke histogram `name`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram(name, help_text).observe(time.perf_counter() - start, **labels)
+
+def timed(name, help_text="", **labels):
+    """Decorator versi `timer`."""
+    def decorator(fn):
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timer(name, help_text, **labels):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def render_prometheus() -> str:
+    """Semua metric dalam format text exposition Prometheus."""
+    with _registry_lock:
+        metrics = list(_registry.values())
+    lines = []
+    for metric in sorted(metrics, key=lambda m: m.name):
+        if metric.help:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for name, key, value in metric.samples():
+            lines.append(f"{name}{_format_labels(key)} {value}")
+    return "\n".join(lines) + "\n"
+
+def write_metrics_file(path=METRICS_FILE):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write(render_prometheus())
+    os.replace(tmp_path, path)
+
+_exporters_started = False
+_exporters_lock = threading.Lock()
+
+def start_exporters():
+    """Jalankan endpoint HTTP (METRICS_PORT) dan/atau penulis file (METRICS_FILE) sekali per proses."""
+    global _exporters_started
+    with _exporters_lock:
+        if _exporters_started:
+            return
+        _exporters_started = True
+
+    if METRICS_PORT:
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.rstrip("/") != "/metrics":
+                    self.send_error(404)
+                    return
+                body = render_prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        try:
+            server = ThreadingHTTPServer(("0.0.0.0", int(METRICS_PORT)), MetricsHandler)
+            threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        except OSError as e:
+            print("Metrics endpoint gagal dijalankan:", e)
+
+    if METRICS_FILE:
+        def write_loop():
+            while True:
+                try:
+                    write_metrics_file(METRICS_FILE)
+                except Exception as e:
+                    print("Gagal menulis metrics file:", e)
+                time.sleep(METRICS_FILE_INTERVAL)
+        threading.Thread(target=write_loop, name="metrics-file", daemon=True).start()
+
+# Profiler per rerun, opt-in dari halaman admin. Berlaku untuk seluruh proses.
+_profiler = {"enabled": False, "last": None}
+
+def set_profiling(enabled: bool):
+    _profiler["enabled"] = enabled
+
+def profiling_enabled() -> bool:
+    return _profiler["enabled"]
+
+def last_profile():
+    """{'label', 'at', 'duration', 'text'} dari rerun terakhir yang diprofil, atau None."""
+    return _profiler["last"]
+
+@contextmanager
+def profile_rerun(label, top=30):
+    """Profil blok dengan cProfile jika profiling aktif; simpan ringkasan cumulative."""
+    if not _profiler["enabled"]:
+        yield
+        return
+    profile = cProfile.Profile()
+    start = time.perf_counter()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        out = io.StringIO()
+        pstats.Stats(profile, stream=out).sort_stats("cumulative").print_stats(top)
+        _profiler["last"] = {
+            "label": label,
+            "at": time.strftime("%H:%M:%S"),
+            "duration": time.perf_counter() - start,
+            "text": out.getvalue(),
+        }
@@ -1,38 +1,72 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-from wordcloud import WordCloud
-import matplotlib.pyplot as plt
+import hashlib
+import hmac
 import sys
 import os
+from datetime import timedelta
 sys.path.append("..") 
-from supabase_manager import fetch_all_responses
+from storage import fallback_pending, fetch_all_responses, fetch_summary, get_backend, replay_fallback
+from email_queue import queue_stats
+from admission import gate_states
+from rollups import FREQUENCIES, RollupStore
+from snapshot import latest_version, load_bundle, refresh_if_stale, start_snapshot_worker
+from text_analytics import TextAnalytics
+from raw_table import PAGE_SIZES, RawTableIndex
+from export import EXPORT_FORMATS, export_responses
+from shared_state import get_store
+from metrics import last_profile, profiling_enabled, render_prometheus, set_profiling, start_exporters
 st.set_page_config(page_title="Admin Dashboard", layout="wide")
 
 st.title("📊 Dashboard Analitik Orange Wallet")
 st.markdown("---")
-pass_admin=os.getenv("ADMIN_PASS")
-def map_sentiment_score(val):
-    """Mengubah teks kualitatif menjadi skor angka (1-5) untuk perhitungan rata-rata."""
-    mapping = {
-        'Sangat Mudah': 5, 'Mudah': 4, 'Biasa': 3, 'Sulit': 2, 'Sangat Sulit': 1,
-        'Sangat Puas': 5, 'Puas': 4, 'Kecewa': 2, 'Sangat Kecewa': 1,
-        'Sangat Intuitif': 5, 'Cukup Jelas': 3, 'Membingungkan': 1,
-        'Cepat': 5, 'Lambat': 1
-    }
-    return mapping.get(val, 3)
-
-def generate_wordcloud(text_data):
-    """Membuat WordCloud dari list teks."""
-    if not text_data:
-        return None
-    text = " ".join([str(t) for t in text_data if str(t) != 'nan' and str(t) != '-'])
-    if not text.strip():
-        return None
-    
-    wc = WordCloud(width=800, height=400, background_color='white', colormap='viridis').generate(text)
-    return wc
+# Hanya digest password yang disimpan; dibandingkan constant-time saat login.
+ADMIN_PASS_DIGEST = hashlib.sha256(os.getenv("ADMIN_PASS", "").encode()).digest() if os.getenv("ADMIN_PASS") else None
+CACHE_TTL = int(os.getenv("ADMIN_CACHE_TTL") or 300)  # detik
+
+def dataset_version(df):
+    """Versi dataset = (jumlah baris, timestamp terbaru)."""
+    if df.empty:
+        return (0, None)
+    return (len(df), str(df['timestamp'].max()))
+
+def check_password(password):
+    if ADMIN_PASS_DIGEST is None:
+        return False
+    return hmac.compare_digest(hashlib.sha256(password.encode()).digest(), ADMIN_PASS_DIGEST)
+
+# Frame disimpan dengan cache_resource agar rerun tidak men-deserialize ulang
+# seluruh tabel; hasilnya diperlakukan read-only. `generation` adalah counter
+# "responses" di shared store: naik tiap ada respon baru atau refresh dari
+# worker mana pun, sehingga cache di semua proses ikut kedaluwarsa. Hanya frame
+# generation terbaru yang disimpan: frame lama tidak ikut tertahan di memori.
+@st.cache_resource(ttl=CACHE_TTL, max_entries=1, show_spinner="Memuat data responden...")
+def load_responses(generation, _full_refresh=False):
+    return fetch_all_responses(full_refresh=_full_refresh)
+
+@st.cache_resource(max_entries=2)
+def load_snapshot(version):
+    """Bundle snapshot dashboard; figure plotly di-parse sekali per versi per proses."""
+    import plotly.io as pio
+
+    bundle = load_bundle(version)
+    bundle['figures'] = {name: pio.from_json(spec) for name, spec in bundle['figures'].items()}
+    return bundle
+
+@st.cache_resource
+def get_rollup_store():
+    """Rollup KPI per jam x segmen, dibagi semua sesi di proses ini."""
+    return RollupStore()
+
+@st.cache_resource(max_entries=2)
+def get_raw_table(version, _df):
+    """Indeks filter/sort/cari untuk tabel Data Mentah, satu per versi dataset."""
+    return RawTableIndex(_df)
+
+@st.cache_resource
+def get_text_analytics():
+    """Hasil analisis teks per respon (sentimen, fitur, frasa), dibagi semua sesi di proses ini."""
+    return TextAnalytics()
 
 if 'admin_logged_in' not in st.session_state:
     st.session_state['admin_logged_in'] = False
@@ -42,7 +76,7 @@ if not st.session_state['admin_logged_in']:
     with col2:
         password = st.text_input("🔑 Masukkan Password Admin:", type="password")
         if st.button("Login"):
-            if password == pass_admin:
+            if check_password(password):
                 st.session_state['admin_logged_in'] = True
                 st.rerun()
             else:
@@ -51,124 +85,272 @@ else:
     if st.sidebar.button("Logout"):
         st.session_state['admin_logged_in'] = False
         st.rerun()
+    shared = get_store()
+    if st.sidebar.button("🔄 Refresh Data"):
+        st.cache_resource.clear()
+        st.cache_data.clear()
+        generation = shared.bump("responses")
+        df = load_responses(generation, _full_refresh=True)
+        fetch_summary(full_refresh=True)  # KPI dihitung ulang, bukan ditambah ke hitungan lama (mis. setelah dedup)
+        refresh_if_stale()
+    else:
+        generation = shared.generation("responses")
+        df = load_responses(generation)
+
+    version = dataset_version(df)
+    st.sidebar.caption(f"Backend: {get_backend().name} · versi data: {version[0]} baris · terakhir {version[1] or '-'}")
+    st.sidebar.caption(f"Cache otomatis kedaluwarsa tiap {CACHE_TTL} detik.")
+
+    with st.sidebar.expander("📧 Antrian Email"):
+        mail_stats = queue_stats()
+        st.metric("Antrian", mail_stats['depth'] + mail_stats['retrying'])
+        st.caption(f"Terkirim {mail_stats['sent']} · Gagal {mail_stats['failed']} (semua worker)")
+        if mail_stats['latency_avg'] is not None:
+            st.caption(f"Latensi rata-rata {mail_stats['latency_avg']:.2f}s · p95 {mail_stats['latency_p95']:.2f}s")
+
+    with st.sidebar.expander("🚦 Admission Control"):
+        BREAKER_LABELS = {"closed": "🟢 normal", "half_open": "🟡 mencoba ulang", "open": "🔴 terbuka"}
+        gates = gate_states()
+        if not gates:
+            st.caption("Belum ada submit, flush database atau email di proses ini.")
+        for gate in gates:
+            st.markdown(f"**{gate['name']}** · breaker {BREAKER_LABELS[gate['state']]}")
+            if gate['state'] == "open":
+                st.caption(f"Dicoba lagi dalam {gate['retry_after']:.0f}s · {gate['failures']} gagal beruntun")
+            st.caption(f"Token {gate['tokens']:.0f}/{gate['burst']} ({gate['rate']:g}/s) · "
+                       f"berjalan {gate['in_flight']}/{gate['concurrency']} · trip {gate['trips']}")
+            st.caption(f"Lolos {gate['admitted']} · gagal {gate['failed']} · ditolak {gate['rejected'] + gate['open']} · "
+                       f"fallback {gate['fallback']}")
+        pending = fallback_pending()
+        if pending:
+            st.warning(f"{pending} respon di journal fallback, menunggu dipindah ke backend utama.")
+            if st.button("Pindahkan sekarang"):
+                try:
+                    st.success(f"{replay_fallback()} respon dipindah.")
+                except Exception as e:
+                    st.error(f"Gagal memindah respon fallback: {e}")
+        st.caption("Status per proses; angka fallback berlaku untuk semua worker.")
+
+    with st.sidebar.expander("⏱️ Metrics & Profiler"):
+        start_exporters()
+        profiling = st.toggle("Profil tiap rerun survei (cProfile)", value=profiling_enabled(),
+                              help="Berlaku untuk seluruh proses; matikan lagi setelah selesai.")
+        if profiling != profiling_enabled():
+            set_profiling(profiling)
+        profile = last_profile()
+        if profile is not None:
+            st.caption(f"Profil terakhir: {profile['label']} · {profile['at']} · {profile['duration']:.3f}s")
+            st.code(profile['text'], language=None)
+        st.download_button("⬇️ metrics.prom", render_prometheus(), file_name="metrics.prom", mime="text/plain")
 
-    df = fetch_all_responses()
+    # KPI, chart utama dan word cloud dibaca dari bundle snapshot (lihat snapshot.py),
+    # bukan dirender ulang tiap rerun.
+    start_snapshot_worker()
+    snapshot_version = latest_version()
+    if snapshot_version is None:
+        with st.spinner("Menyiapkan snapshot dashboard..."):
+            refresh_if_stale()
+            snapshot_version = latest_version()
+    snapshot = load_snapshot(snapshot_version) if snapshot_version else None
+    if snapshot is not None:
+        stale = " · memperbarui di background" if snapshot['generation'] < generation else ""
+        st.sidebar.caption(f"Snapshot chart: {snapshot['rows']} baris · {snapshot['created_at']}{stale}")
 
     if df.empty:
         st.warning("📭 Belum ada data responden yang masuk.")
     else:
-        st.subheader("📈 Ringkasan Performa")
-        
-        df['score_topup'] = df['topup_score'].apply(map_sentiment_score)
-        df['score_transfer'] = df['transfer_score'].apply(map_sentiment_score)
-        df['score_split'] = df['split_score'].apply(map_sentiment_score)
-        df['score_shared'] = df['shared_score'].apply(map_sentiment_score)
-        df['score_satisfaction'] = df['kepuasan_akhir'].apply(map_sentiment_score)
-        
-        total_user = len(df)
-        avg_satisfaction = df['score_satisfaction'].mean()
-        
-        retention_count = df[df['niat_penggunaan'].str.contains('Ya', na=False)].shape[0]
-        retention_rate = (retention_count / total_user) * 100 if total_user > 0 else 0
+        if snapshot is None or snapshot['kpis'] is None:
+            st.info("⏳ Snapshot dashboard sedang disiapkan worker lain; muat ulang sebentar lagi.")
+        else:
+            st.subheader("📈 Ringkasan Performa")
+
+            kpis = snapshot['kpis']
+            kpi1, kpi2, kpi3, kpi4 = st.columns(4)
+            kpi1.metric("Total Responden", f"{kpis['total']} Orang")
+            kpi2.metric("Rata-rata Kepuasan", f"{kpis['satisfaction']:.1f} / 5.0", delta_color="normal")
+            kpi3.metric("Potential Retention", f"{kpis['retention_pct']:.1f}%")
+            kpi4.metric("Fitur Terpopuler", kpis['top_feature'])
+
+            st.markdown("---")
+
+            figures = snapshot['figures']
+            col_radar, col_bar = st.columns([1, 1])
+
+            with col_radar:
+                st.subheader("🕸️ Peta Kekuatan Fitur (Radar Chart)")
+                st.plotly_chart(figures['radar'], use_container_width=True)
+                st.caption("*Skala 1-5 (Semakin luas jaring, semakin baik performa keseluruhan)*")
 
-        kpi1, kpi2, kpi3, kpi4 = st.columns(4)
-        kpi1.metric("Total Responden", f"{total_user} Orang")
-        kpi2.metric("Rata-rata Kepuasan", f"{avg_satisfaction:.1f} / 5.0", delta_color="normal")
-        kpi3.metric("Potential Retention", f"{retention_rate:.1f}%")
-        kpi4.metric("Fitur Terpopuler", df[['score_topup', 'score_transfer', 'score_split', 'score_shared']].mean().idxmax().replace('score_', '').title())
+            with col_bar:
+                st.subheader("📊 Distribusi Kepuasan Akhir")
+                st.plotly_chart(figures['bar'], use_container_width=True)
+
+                st.markdown("##### Insight Niat Penggunaan")
+                st.plotly_chart(figures['pie'], use_container_width=True)
 
         st.markdown("---")
 
-        col_radar, col_bar = st.columns([1, 1])
-        
-        with col_radar:
-            st.subheader("🕸️ Peta Kekuatan Fitur (Radar Chart)")
-            
-            radar_data = pd.DataFrame({
-                'Fitur': ['Top Up', 'Transfer', 'Split Bill', 'Shared Wallet', 'Navigasi UI', 'Performa App'],
-                'Skor': [
-                    df['score_topup'].mean(),
-                    df['score_transfer'].mean(),
-                    df['score_split'].mean(),
-                    df['score_shared'].mean(),
-                    df['ui_navigasi'].apply(map_sentiment_score).mean(),
-                    df['ui_performa'].apply(map_sentiment_score).mean()
-                ]
-            })
-            
-            fig_radar = go.Figure(data=go.Scatterpolar(
-                r=radar_data['Skor'],
-                theta=radar_data['Fitur'],
-                fill='toself',
-                name='Rata-rata Skor'
-            ))
-            fig_radar.update_layout(
-                polar=dict(radialaxis=dict(visible=True, range=[0, 5])),
-                showlegend=False,
-                height=400
-            )
-            st.plotly_chart(fig_radar, use_container_width=True)
-            st.caption("*Skala 1-5 (Semakin luas jaring, semakin baik performa keseluruhan)*")
-
-        with col_bar:
-            st.subheader("📊 Distribusi Kepuasan Akhir")
-            
-            sat_counts = df['kepuasan_akhir'].value_counts().reset_index()
-            sat_counts.columns = ['Kepuasan', 'Jumlah']
-            
-            fig_bar = px.bar(sat_counts, x='Kepuasan', y='Jumlah', 
-                             color='Jumlah', color_continuous_scale='Oranges')
-            st.plotly_chart(fig_bar, use_container_width=True)
-            
-            st.markdown("##### Insight Niat Penggunaan")
-            use_counts = df['niat_penggunaan'].value_counts()
-            fig_pie = px.pie(values=use_counts.values, names=use_counts.index, hole=0.4)
-            fig_pie.update_layout(height=250, margin=dict(t=0, b=0, l=0, r=0))
-            st.plotly_chart(fig_pie, use_container_width=True)
+        # plotly baru di-import setelah login; halaman login tidak membayar biaya import-nya.
+        import plotly.express as px
+
+        st.subheader("📆 Tren & Segmen")
+        st.caption("Dihitung dari rollup per jam x kompetitor x anonim; rentang dan segmen digabung dari bucket, bukan dari baris respon.")
+
+        rollup_store = get_rollup_store()
+        rollup_store.update(df)
+
+        segment_labels = {"Semua": None, "Kompetitor": "kompetitor_nama", "Anonim vs Bernama": "anonim"}
+        metric_labels = {
+            "Rata-rata Kepuasan": "score_satisfaction",
+            "Retention (%)": "retention_pct",
+            "Jumlah Responden": "responden",
+            "Skor Top Up": "score_topup",
+            "Skor Transfer": "score_transfer",
+            "Skor Split Bill": "score_split",
+            "Skor Shared Wallet": "score_shared",
+        }
+        trend_col1, trend_col2, trend_col3, trend_col4 = st.columns(4)
+        trend_freq = trend_col1.selectbox("Periode:", list(FREQUENCIES), index=1)
+        trend_segment = trend_col2.selectbox("Segmen:", list(segment_labels))
+        trend_metric = trend_col3.selectbox("Metrik:", list(metric_labels))
+        trend_range = trend_col4.date_input("Rentang tanggal:", value=(), key="trend_range")
+
+        trend_start = trend_end = None
+        if len(trend_range) >= 1:
+            trend_start = pd.Timestamp(trend_range[0], tz='UTC')
+            trend_end = pd.Timestamp(trend_range[-1], tz='UTC') + timedelta(days=1)
+        segment_col = segment_labels[trend_segment]
+        metric_col = metric_labels[trend_metric]
+
+        trend = rollup_store.query(trend_start, trend_end, freq=FREQUENCIES[trend_freq], segment=segment_col).reset_index()
+        if trend.empty:
+            st.info("Tidak ada respon pada rentang ini.")
+        else:
+            fig_trend = px.line(trend, x='periode', y=metric_col, color=segment_col, markers=True,
+                                labels={'periode': 'Periode', metric_col: trend_metric})
+            fig_trend.update_layout(height=350, margin=dict(t=10, b=0, l=0, r=0))
+            st.plotly_chart(fig_trend, use_container_width=True)
+
+            if segment_col:
+                segment_table = rollup_store.query(trend_start, trend_end, segment=segment_col)
+                st.dataframe(
+                    segment_table.rename(columns={v: k for k, v in metric_labels.items()}).style.format(precision=2),
+                    use_container_width=True,
+                )
 
         st.markdown("---")
 
         st.subheader("☁️ Apa Kata Mereka? (Word Cloud)")
-        
+
+        wordclouds = snapshot['images'] if snapshot is not None else {}
         wc_col1, wc_col2 = st.columns(2)
         
         with wc_col1:
             st.markdown("**Feedback: Top Up & Transfer**")
-            text_trx = list(df['topup_feedback'].dropna()) + list(df['transfer_feedback'].dropna())
-            wc_trx = generate_wordcloud(text_trx)
+            wc_trx = wordclouds.get('wordcloud_trx')
             if wc_trx:
-                fig_wc, ax = plt.subplots()
-                ax.imshow(wc_trx, interpolation='bilinear')
-                ax.axis("off")
-                st.pyplot(fig_wc)
+                st.image(wc_trx, use_column_width=True)
             else:
                 st.info("Belum cukup data teks.")
 
         with wc_col2:
             st.markdown("**Feedback: Pesan Terakhir**")
-            text_final = list(df['pesan_akhir'].dropna())
-            wc_final = generate_wordcloud(text_final)
+            wc_final = wordclouds.get('wordcloud_final')
             if wc_final:
-                fig_wc2, ax = plt.subplots()
-                ax.imshow(wc_final, interpolation='bilinear')
-                ax.axis("off")
-                st.pyplot(fig_wc2)
+                st.image(wc_final, use_column_width=True)
+            else:
+                st.info("Belum cukup data teks.")
+
+        st.markdown("---")
+
+        st.subheader("🧠 Sentimen & Frasa per Fitur")
+        st.caption("Dihitung sekali per respon (leksikon sentimen, tagging fitur, bigram/trigram) lalu di-cache; tabel di bawah dibaca dari hasil tersebut.")
+
+        text_analytics = get_text_analytics()
+        with st.spinner("Menganalisis feedback baru..."):
+            text_analytics.update(df)
+
+        ta_col1, ta_col2 = st.columns(2)
+
+        with ta_col1:
+            st.markdown("**Sentimen per Fitur**")
+            feature_table = text_analytics.feature_sentiment()
+            if feature_table.empty:
+                st.info("Belum cukup data teks.")
             else:
+                st.dataframe(feature_table.style.format('{:.1f}', subset=['Positif (%)', 'Negatif (%)'])
+                             .format('{:+.2f}', subset=['Skor Rata-rata']), use_container_width=True)
+
+        with ta_col2:
+            st.markdown("**Frasa Teratas**")
+            phrase_table = text_analytics.top_phrases()
+            if phrase_table.empty:
                 st.info("Belum cukup data teks.")
+            else:
+                st.dataframe(phrase_table.style.format('{:+.2f}', subset=['Sentimen']),
+                             hide_index=True, use_container_width=True)
 
         st.markdown("---")
 
         st.subheader("🗃️ Data Mentah")
         
+        # Filter, sort dan pencarian dijalankan di indeks; browser hanya menerima satu halaman.
+        raw_table = get_raw_table(version, df)
         all_cols = df.columns.tolist()
         selected_cols = st.multiselect("Pilih Kolom:", all_cols, default=['timestamp', 'nama', 'kepuasan_akhir', 'pesan_akhir'])
+
+        raw_col1, raw_col2, raw_col3 = st.columns([2, 1, 1])
+        raw_search = raw_col1.text_input("Cari di feedback:", placeholder="mis. lambat promo")
+        raw_sort = raw_col2.selectbox("Urutkan:", all_cols, index=all_cols.index('timestamp') if 'timestamp' in all_cols else 0)
+        raw_desc = raw_col3.toggle("Menurun", value=True)
+
+        raw_filter_cols = st.multiselect("Filter jawaban:", list(raw_table.filter_columns))
+        raw_filters = []
+        if raw_filter_cols:
+            for col, widget in zip(raw_filter_cols, st.columns(len(raw_filter_cols))):
+                values = widget.multiselect(col, raw_table.filter_columns[col], key=f"raw_filter_{col}")
+                if values:
+                    raw_filters.append((col, tuple(values)))
+
+        positions = raw_table.query(tuple(raw_filters), raw_search, raw_sort, raw_desc)
+        page_col1, page_col2, page_col3 = st.columns([1, 1, 2])
+        page_size = page_col1.selectbox("Baris per halaman:", PAGE_SIZES, index=1)
+        total_pages = max(1, -(-len(positions) // page_size))
+        page = page_col2.number_input("Halaman:", min_value=1, max_value=total_pages, value=1)
+        page_col3.caption(f"{len(positions)} dari {len(raw_table)} baris cocok · halaman {page} dari {total_pages}")
+
+        st.dataframe(raw_table.page(positions, page, page_size, selected_cols), use_container_width=True)
         
-        st.dataframe(df[selected_cols], use_container_width=True)
-        
-        csv = df.to_csv(index=False).encode('utf-8')
-        st.download_button(
-            "📥 Download Data Lengkap (CSV)",
-            csv,
-            "hasil_survei_orange_wallet.csv",
-            "text/csv"
-        )
\ No newline at end of file
+
+        st.markdown("---")
+
+        st.subheader("📥 Export Data")
+        st.caption("File dibuat hanya saat diminta, dibaca per chunk langsung dari backend.")
+
+        exp_col1, exp_col2, exp_col3 = st.columns([1, 1, 2])
+        export_format = exp_col1.selectbox("Format:", list(EXPORT_FORMATS))
+        export_range = exp_col2.date_input("Rentang tanggal:", value=())
+        export_cols = exp_col3.multiselect("Kolom export:", all_cols, default=all_cols)
+
+        if st.button("Siapkan File Export", disabled=not export_cols):
+            start = end = None
+            if len(export_range) >= 1:
+                start = export_range[0].isoformat()
+                end = (export_range[-1] + timedelta(days=1)).isoformat()
+            with st.spinner("Menyiapkan export..."):
+                data, row_count = export_responses(export_format, export_cols, start, end)
+            # Disimpan di sesi (bukan path file) agar tidak ada file sementara yang tertinggal.
+            st.session_state['export_data'] = data
+            st.session_state['export_format'] = export_format
+            st.session_state['export_rows'] = row_count
+
+        export_data = st.session_state.get('export_data')
+        if export_data is not None:
+            ext, mime = EXPORT_FORMATS[st.session_state['export_format']]
+            st.caption(f"{st.session_state['export_rows']} baris siap diunduh.")
+            st.download_button(
+                "📥 Download Data",
+                export_data,
+                f"hasil_survei_orange_wallet.{ext}",
+                mime
+            )
\ No newline at end of file
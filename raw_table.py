@@ -0,0 +1,121 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from schema import CLOSED_CHOICE_COLUMNS
+from wordfreq import FEEDBACK_FIELDS
+
+SEARCH_COLUMNS = FEEDBACK_FIELDS
+PAGE_SIZES = [25, 50, 100, 200]
+QUERY_CACHE_SIZE = 32
+
+class RawTableIndex:
+    """
+    Indeks baca untuk tabel Data Mentah di dashboard, dibangun sekali per versi
+    dataset. Filter jawaban memakai kode kategori (numpy), pencarian teks
+    memakai kamus nilai unik per kolom teks yang di-lowercase sekali (pyarrow), dan
+    urutan sort per kolom dihitung saat pertama diminta lalu disimpan. `query`
+    mengembalikan posisi baris hasil filter + sort (di-cache LRU) dan `page`
+    hanya mengambil baris satu halaman, jadi yang dikirim ke browser sebatas
+    halaman yang ditampilkan.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self.filter_columns = {
+            col: list(df[col].cat.categories) for col in CLOSED_CHOICE_COLUMNS
+            if col in df.columns and isinstance(df[col].dtype, pd.CategoricalDtype)
+        }
+        self._lock = threading.Lock()
+        self._text = None
+        self._orders = {}
+        self._queries = OrderedDict()
+
+    def __len__(self):
+        return len(self.df)
+
+    def _search_columns(self) -> list:
+        """Per kolom teks: (nilai unik lowercase, kode per baris; kosong = kode di luar kamus)."""
+        if self._text is None:
+            self._text = []
+            for col in SEARCH_COLUMNS:
+                if col not in self.df.columns:
+                    continue
+                encoded = pc.dictionary_encode(pa.array(self.df[col].astype('string[pyarrow]')))
+                values = pc.utf8_lower(encoded.dictionary)
+                codes = pc.fill_null(encoded.indices, len(values)).to_numpy()
+                self._text.append((values, codes))
+        return self._text
+
+    def _search(self, term) -> np.ndarray:
+        # Feedback banyak yang kosong/berulang: cocokkan kamus nilai unik, lalu petakan ke baris lewat kode.
+        found = np.zeros(len(self.df), dtype=bool)
+        for values, codes in self._search_columns():
+            hit = np.zeros(len(values) + 1, dtype=bool)
+            hit[:-1] = pc.match_substring(values, term).to_numpy(zero_copy_only=False)
+            found |= hit[codes]
+        return found
+
+    def _order(self, column, descending=False) -> np.ndarray:
+        """Posisi baris terurut menurut `column` (stabil, nilai kosong selalu di akhir, juga saat descending)."""
+        key = (column, descending)
+        if key not in self._orders:
+            series = self.df[column]
+            if isinstance(series.dtype, pd.CategoricalDtype):
+                # Urutan kategori = urutan pilihan di form (mis. skala Likert), kosong (-1) di akhir.
+                codes = series.cat.codes.to_numpy().astype(np.int64)
+                missing = codes < 0
+                if descending:
+                    codes = -codes
+                codes[missing] = len(series.cat.categories)
+                order = np.argsort(codes, kind='stable')
+            else:
+                order = pc.array_sort_indices(pa.array(series), order='descending' if descending else 'ascending',
+                                              null_placement='at_end').to_numpy()
+            self._orders[key] = order
+        return self._orders[key]
+
+    def _mask(self, filters, search):
+        mask = None
+        for col, values in filters:
+            categories = self.filter_columns[col]
+            codes = [categories.index(v) for v in values if v in categories]
+            selected = np.isin(self.df[col].cat.codes.to_numpy(), codes)
+            mask = selected if mask is None else mask & selected
+        for term in search.lower().split():
+            found = self._search(term)
+            mask = found if mask is None else mask & found
+        return mask
+
+    def query(self, filters=(), search="", sort=None, descending=False) -> np.ndarray:
+        """
+        Posisi baris yang cocok. `filters` = ((kolom, (nilai, ...)), ...) untuk
+        kolom pilihan tertutup; `search` = kata-kata yang semuanya harus muncul
+        di kolom feedback (tanpa beda huruf besar-kecil).
+        """
+        key = (tuple(filters), search.strip().lower(), sort, descending)
+        with self._lock:
+            if key in self._queries:
+                self._queries.move_to_end(key)
+                return self._queries[key]
+
+            mask = self._mask(filters, search)
+            if sort is not None:
+                order = self._order(sort, descending)
+                positions = order if mask is None else order[mask[order]]
+            else:
+                positions = np.arange(len(self.df)) if mask is None else np.flatnonzero(mask)
+
+            self._queries[key] = positions
+            if len(self._queries) > QUERY_CACHE_SIZE:
+                self._queries.popitem(last=False)
+            return positions
+
+    def page(self, positions, page, page_size, columns) -> pd.DataFrame:
+        """Baris halaman ke-`page` (mulai 1) dari hasil `query`, hanya kolom `columns`."""
+        start = (page - 1) * page_size
+        return self.df.iloc[positions[start:start + page_size]][columns]
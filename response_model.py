@@ -0,0 +1,202 @@
+import re
+from dataclasses import dataclass, field, fields
+
+import msgpack
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from schema import CLOSED_CHOICE_COLUMNS, FREE_TEXT_COLUMNS
+
+SCHEMA_VERSION = 2  # 1 = dict lama tanpa field schema_version
+MAX_TEXT_LENGTH = 2000
+_EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
+
+@dataclass(slots=True)
+class SurveyResponse:
+    """
+    Satu respon survei, field sesuai urutan halaman form. Key di luar skema
+    disimpan di `extra` supaya tidak hilang saat decode/encode ulang.
+    """
+
+    nama: str = ''
+    email: str = ''
+    anonim: str = None
+    topup_score: str = None
+    topup_feedback: str = ''
+    transfer_score: str = None
+    transfer_feedback: str = ''
+    split_score: str = None
+    split_feedback: str = ''
+    shared_score: str = None
+    shared_feedback: str = ''
+    ui_navigasi: str = None
+    ui_performa: str = None
+    kompetitor_nama: str = None
+    kompetitor_fitur: str = ''
+    kepuasan_akhir: str = None
+    niat_penggunaan: str = None
+    pesan_akhir: str = ''
+    submission_id: str = None
+    schema_version: int = SCHEMA_VERSION
+    extra: dict = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "SurveyResponse":
+        known = {name: data[name] for name in FIELD_NAMES if name in data}
+        extra = {k: v for k, v in data.items() if k not in _FIELD_SET}
+        return cls(**known, extra=extra)
+
+    def to_dict(self) -> dict:
+        data = {name: getattr(self, name) for name in FIELD_NAMES}
+        if data['submission_id'] is None:
+            del data['submission_id']
+        data.update(self.extra)
+        return data
+
+    def validate(self) -> list:
+        """Daftar pesan kesalahan (kosong jika valid)."""
+        errors = []
+        for name, allowed in CLOSED_CHOICE_COLUMNS.items():
+            value = getattr(self, name)
+            if value is None:
+                errors.append(f"{name} belum diisi")
+            elif value not in allowed:
+                errors.append(f"{name}: pilihan tidak dikenal ({value})")
+        for name in FREE_TEXT_COLUMNS:
+            value = getattr(self, name)
+            if not isinstance(value, str):
+                errors.append(f"{name} harus teks")
+            elif len(value) > MAX_TEXT_LENGTH:
+                errors.append(f"{name} terlalu panjang (maks {MAX_TEXT_LENGTH} karakter)")
+        if self.anonim == 'Tidak':
+            if not self.nama.strip():
+                errors.append("nama belum diisi")
+            if not _EMAIL_RE.match(self.email):
+                errors.append("format email tidak valid")
+        if self.schema_version != SCHEMA_VERSION:
+            errors.append(f"schema_version {self.schema_version} tidak didukung")
+        return errors
+
+    def pack(self) -> bytes:
+        """msgpack array [versi, field..., extra] tanpa nama key."""
+        values = [getattr(self, name) for name in FIELD_NAMES]
+        return msgpack.packb(values + [self.extra or None], use_bin_type=True)
+
+FIELD_NAMES = [f.name for f in fields(SurveyResponse) if f.name != 'extra']
+FIELD_NAMES.insert(0, FIELD_NAMES.pop(FIELD_NAMES.index('schema_version')))  # versi selalu elemen pertama
+_FIELD_SET = set(FIELD_NAMES)
+
+# Urutan field array msgpack per versi skema; versi baru menambah entri di sini.
+PACKED_LAYOUTS = {2: FIELD_NAMES}
+
+def pack_data(data: dict) -> bytes:
+    return SurveyResponse.from_dict(data).pack()
+
+def unpack_data(blob) -> dict:
+    """bytes msgpack -> dict respon (versi aslinya, migrasi dilakukan saat decode). Dict dikembalikan apa adanya."""
+    if isinstance(blob, dict):
+        return blob
+    values = msgpack.unpackb(blob, raw=False)
+    layout = PACKED_LAYOUTS[values[0]]
+    data = dict(zip(layout, values))
+    if data.get('submission_id') is None:
+        data.pop('submission_id', None)
+    extra = values[len(layout)] if len(values) > len(layout) else None
+    if extra:
+        data.update(extra)
+    return data
+
+# --- migrasi (per kolom, untuk batch yang sudah di-decode) ---
+
+def _v1_to_v2(frame, rows):
+    """Respon awal: 'anonim' belum selalu ada (turunkan dari nama) dan teks bebas belum di-strip."""
+    # Operasi per kolom utuh lalu `where`, bukan .loc per baris: batch lama biasanya seluruhnya v1.
+    if 'nama' in frame.columns:
+        if 'anonim' not in frame.columns:
+            frame['anonim'] = pd.Categorical([None] * len(frame), categories=CLOSED_CHOICE_COLUMNS['anonim'])
+        nama = frame['nama']
+        derived = np.where(nama.eq('Anonim').fillna(False).to_numpy(bool), 'Ya', 'Tidak')
+        missing = (rows & frame['anonim'].isna() & nama.notna()).to_numpy()
+        if missing.any():
+            frame['anonim'] = frame['anonim'].where(~missing, derived)
+    for col in FREE_TEXT_COLUMNS:
+        if col in frame.columns:
+            frame[col] = frame[col].str.strip().where(rows, frame[col])
+
+MIGRATIONS = {1: _v1_to_v2}  # versi -> migrasi ke versi berikutnya
+
+def _migrate(frame):
+    if 'schema_version' in frame.columns:
+        versions = pd.to_numeric(frame['schema_version'], errors='coerce').fillna(1).astype(int)
+    else:
+        versions = pd.Series(1, index=frame.index)
+    for version in sorted(MIGRATIONS):
+        rows = versions == version
+        if rows.any():
+            MIGRATIONS[version](frame, rows)
+            versions[rows] = version + 1
+    frame['schema_version'] = versions.astype('int8')
+    return frame
+
+# --- decoder kolumnar ---
+
+def _typed_column(name, values):
+    """Satu kolom langsung ke tipe ringkas (lihat schema.to_compact_frame), tanpa frame object perantara."""
+    try:
+        array = pa.array(values, type=pa.string())
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return values  # nilai non-teks (kolom tak dikenal): biarkan object
+    if name in CLOSED_CHOICE_COLUMNS:
+        categories = list(CLOSED_CHOICE_COLUMNS[name])
+        codes = pc.index_in(array, value_set=pa.array(categories))
+        if codes.null_count != array.null_count:
+            # Ada jawaban di luar pilihan form: jadikan kategori tambahan seperti to_compact_frame.
+            unknown = pc.filter(array, pc.and_(pc.is_null(codes), pc.is_valid(array)))
+            categories += sorted(pc.unique(unknown).to_pylist())
+            codes = pc.index_in(array, value_set=pa.array(categories))
+        return pd.Categorical.from_codes(pc.fill_null(codes, -1).to_numpy(), categories=categories)
+    if name in FREE_TEXT_COLUMNS:
+        return pd.arrays.ArrowStringArray(array)
+    return values
+
+def _packed_columns(blobs):
+    """Batch msgpack satu versi -> {kolom: nilai}: dibaca sebagai satu stream lalu dipotong per posisi, tanpa dict per baris."""
+    data = b"".join(blobs)
+    unpacker = msgpack.Unpacker(use_list=False, raw=False, max_buffer_size=max(len(data), 1))
+    unpacker.feed(data)
+    values = list(unpacker)
+    if len({row[0] for row in values}) != 1:
+        return None
+    layout = PACKED_LAYOUTS[values[0][0]]
+    columns = dict(zip(layout, map(list, zip(*(row[:len(layout)] for row in values)))))
+    if not any(v is not None for v in columns.get('submission_id', ())):
+        columns.pop('submission_id', None)  # sama seperti dict: key hanya ada jika diisi
+    extras = [row[len(layout)] if len(row) > len(layout) else None for row in values]
+    for key in sorted(set().union(*(extra for extra in extras if extra))):
+        columns[key] = [extra.get(key) if extra else None for extra in extras]
+    return columns
+
+def decode_rows(rows, timestamps=None) -> pd.DataFrame:
+    """
+    Batch baris tersimpan (kolom `data`: dict JSON, bytes msgpack, atau None)
+    -> DataFrame bertipe ringkas yang sudah dimigrasi ke SCHEMA_VERSION.
+    Nilai diambil per kolom dan langsung dibangun sebagai array Arrow/category,
+    tanpa list dict perantara per baris. Hanya key yang muncul di batch yang
+    menjadi kolom.
+    """
+    rows = list(rows)
+    columns = None
+    if rows and all(isinstance(row, bytes) for row in rows):
+        columns = _packed_columns(rows)
+    if columns is None:
+        records = [row if isinstance(row, dict) else (unpack_data(row) if row else {}) for row in rows]
+        present = set().union(*records)
+        names = [name for name in FIELD_NAMES if name in present] + sorted(present - _FIELD_SET)
+        columns = {name: [r.get(name) for r in records] for name in names}
+    frame = pd.DataFrame({name: _typed_column(name, values) for name, values in columns.items()},
+                         index=pd.RangeIndex(len(rows)))
+    if timestamps is not None:
+        frame['timestamp'] = timestamps
+    return _migrate(frame)
@@ -0,0 +1,107 @@
+import pandas as pd
+
+from incremental import IncrementalAggregate
+from scoring import SCORE_COLUMNS, score_responses
+
+ROLLUP_KEY = "rollups.hourly"
+SEGMENT_COLUMNS = ['kompetitor_nama', 'anonim']
+METRIC_COLUMNS = ['responden', 'retained'] + list(SCORE_COLUMNS.values())
+FREQUENCIES = {'Per Jam': 'h', 'Harian': 'D', 'Mingguan': 'W'}
+MISSING = '-'
+
+class RollupStore(IncrementalAggregate):
+    """
+    Agregat per bucket (jam UTC x kompetitor_nama x anonim): jumlah responden,
+    jumlah yang berniat memakai, dan jumlah skor per kolom skor. Bucket disimpan
+    di shared store dan hanya diperbarui untuk baris baru (lihat
+    IncrementalAggregate), jadi rentang waktu atau segmen apa pun dijawab dengan
+    menggabungkan bucket, bukan memindai baris respon.
+    """
+
+    def __init__(self, store=None, key=ROLLUP_KEY):
+        super().__init__(store, key)
+
+    def _clear(self):
+        self.buckets = {}  # "jam|kompetitor|anonim" -> [nilai per METRIC_COLUMNS]
+        self._frame = None
+
+    def _dump(self):
+        return self.buckets
+
+    def _restore(self, state):
+        self.buckets = state
+        self._frame = None
+
+    @staticmethod
+    def _bucket_rows(rows) -> pd.DataFrame:
+        """Agregasi baris baru ke bucket (groupby hanya atas baris yang belum dilihat)."""
+        scored = score_responses(rows)
+        hour = pd.to_datetime(rows['timestamp'], utc=True, format='ISO8601', errors='coerce').dt.floor('h')
+        keys = pd.DataFrame({
+            'jam': hour.dt.strftime('%Y-%m-%dT%H').fillna(MISSING),
+            **{col: rows[col].astype(object).fillna(MISSING).astype(str) if col in rows.columns else MISSING
+               for col in SEGMENT_COLUMNS},
+        }, index=rows.index)
+        niat = rows['niat_penggunaan'].astype(str) if 'niat_penggunaan' in rows.columns else pd.Series('', index=rows.index)
+        values = pd.DataFrame({
+            'responden': 1,
+            'retained': niat.str.contains('Ya').astype(int),
+            **{col: scored[col].astype(int) for col in SCORE_COLUMNS.values()},
+        }, index=rows.index)
+        return pd.concat([keys, values], axis=1).groupby(['jam'] + SEGMENT_COLUMNS).sum()
+
+    def _add(self, rows) -> int:
+        grouped = self._bucket_rows(rows)
+        for key, values in zip(grouped.index, grouped[METRIC_COLUMNS].to_numpy().tolist()):
+            bucket_key = "|".join(key)
+            current = self.buckets.get(bucket_key)
+            self.buckets[bucket_key] = values if current is None else [a + b for a, b in zip(current, values)]
+        self._frame = None
+        return len(rows)
+
+    def frame(self) -> pd.DataFrame:
+        """Semua bucket sebagai DataFrame (jam, segmen, metrik), di-cache sampai update berikutnya."""
+        with self._lock:
+            if self._frame is None:
+                keys = pd.DataFrame([key.split("|") for key in self.buckets], columns=['jam'] + SEGMENT_COLUMNS)
+                values = pd.DataFrame(list(self.buckets.values()), columns=METRIC_COLUMNS, dtype='int64')
+                frame = pd.concat([keys, values], axis=1)
+                frame['jam'] = pd.to_datetime(frame['jam'].replace(MISSING, None), format='%Y-%m-%dT%H', utc=True)
+                self._frame = frame
+            return self._frame
+
+    def query(self, start=None, end=None, freq=None, segment=None, kompetitor=None, anonim=None) -> pd.DataFrame:
+        """
+        KPI hasil penggabungan bucket dalam rentang [start, end) (Timestamp UTC),
+        opsional difilter per kompetitor/anonim, dikelompokkan per periode
+        `freq` ('h', 'D', 'W') dan/atau kolom `segment`. Kolom hasil: responden,
+        retention_pct dan rata-rata tiap kolom skor.
+        """
+        buckets = self.frame()
+        mask = pd.Series(True, index=buckets.index)
+        if start is not None:
+            mask &= buckets['jam'] >= start
+        if end is not None:
+            mask &= buckets['jam'] < end
+        if kompetitor:
+            mask &= buckets['kompetitor_nama'].isin(kompetitor)
+        if anonim:
+            mask &= buckets['anonim'] == anonim
+        buckets = buckets[mask]
+
+        group_keys = []
+        if freq:
+            group_keys.append(buckets['jam'].dt.tz_localize(None).dt.to_period(freq).dt.start_time.rename('periode'))
+        if segment:
+            group_keys.append(buckets[segment])
+        if group_keys:
+            totals = buckets[METRIC_COLUMNS].groupby(group_keys).sum()
+        else:
+            totals = buckets[METRIC_COLUMNS].sum().to_frame().T
+
+        result = pd.DataFrame({'responden': totals['responden']}, index=totals.index)
+        n = totals['responden'].where(totals['responden'] > 0)
+        result['retention_pct'] = totals['retained'] / n * 100
+        for col in SCORE_COLUMNS.values():
+            result[col] = totals[col] / n
+        return result
@@ -0,0 +1,110 @@
+import pandas as pd
+
+from scoring import QUESTION_SCALES
+
+# Jawaban pilihan tertutup -> kategori yang diketahui (urutan sesuai form).
+# Nilai lain yang muncul di data tetap disimpan sebagai kategori tambahan.
+CLOSED_CHOICE_COLUMNS = {
+    'anonim': ['Ya', 'Tidak'],
+    **{question: list(scale) for question, scale in QUESTION_SCALES.items()},
+    'kompetitor_nama': ['GoPay', 'OVO', 'DANA', 'ShopeePay', 'LinkAja', 'Lainnya'],
+    'niat_penggunaan': ['Ya, Pasti', 'Mungkin', 'Tidak'],
+}
+FREE_TEXT_COLUMNS = [
+    'nama', 'email', 'topup_feedback', 'transfer_feedback', 'split_feedback',
+    'shared_feedback', 'kompetitor_fitur', 'pesan_akhir',
+]
+TIMESTAMP_COLUMN = 'timestamp'
+TEXT_DTYPE = 'string[pyarrow]'
+
+def _categorical(series: pd.Series, known: list) -> pd.Series:
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        observed = list(series.cat.categories)
+    else:
+        observed = list(series.dropna().unique())
+    extra = sorted(str(v) for v in observed if v not in known)
+    categories = known + extra
+    if isinstance(series.dtype, pd.CategoricalDtype) and list(series.cat.categories) == categories:
+        return series
+    return pd.Series(pd.Categorical(series, categories=categories), index=series.index, name=series.name)
+
+def to_compact_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Ubah frame respon ke tipe ringkas: category untuk jawaban pilihan tertutup,
+    datetime64 UTC untuk timestamp, string[pyarrow] untuk teks bebas.
+    Kolom yang sudah bertipe benar tidak diubah; kolom tak dikenal dibiarkan.
+    """
+    if df.empty:
+        return df
+    compact = df.copy(deep=False)
+    for col, known in CLOSED_CHOICE_COLUMNS.items():
+        if col in compact.columns:
+            compact[col] = _categorical(compact[col], known)
+    for col in FREE_TEXT_COLUMNS:
+        if col in compact.columns and compact[col].dtype != TEXT_DTYPE:
+            compact[col] = compact[col].astype(TEXT_DTYPE)
+    if TIMESTAMP_COLUMN in compact.columns and not pd.api.types.is_datetime64_any_dtype(compact[TIMESTAMP_COLUMN]):
+        compact[TIMESTAMP_COLUMN] = pd.to_datetime(compact[TIMESTAMP_COLUMN], utc=True, format='ISO8601', errors='coerce')
+    return compact
+
+def _empty_column(dtype, index) -> pd.Series:
+    try:
+        return pd.Series(index=index, dtype=dtype)
+    except (TypeError, ValueError):
+        return pd.Series(index=index, dtype=object)  # mis. int tanpa NA: biarkan concat yang menentukan
+
+def concat_compact(frames: list) -> pd.DataFrame:
+    """
+    Gabungkan frame ringkas (mis. snapshot + halaman baru) tanpa jatuh ke object.
+    Tiap frame diringkas dulu (frame yang sudah ringkas tidak disalin), kategori
+    kolom yang sama disatukan (urutan frame pertama dipertahankan, kategori baru
+    ditambah di belakang) dan kolom yang tidak ada di sebagian frame diisi NA
+    dengan dtype yang sama.
+    """
+    frames = [to_compact_frame(frame) for frame in frames if not frame.empty]
+    if not frames:
+        return pd.DataFrame()
+    if len(frames) == 1:
+        return frames[0]
+
+    columns = list(dict.fromkeys(col for frame in frames for col in frame.columns))
+    dtypes = {}
+    for col in columns:
+        present = [frame[col].dtype for frame in frames if col in frame.columns]
+        categorical = [dtype for dtype in present if isinstance(dtype, pd.CategoricalDtype)]
+        if categorical:
+            categories = list(CLOSED_CHOICE_COLUMNS.get(col, []))
+            categories = list(dict.fromkeys(
+                [*categorical[0].categories, *categories, *(c for dtype in categorical[1:] for c in dtype.categories)]
+            ))
+            dtypes[col] = pd.CategoricalDtype(categories)
+        else:
+            dtypes[col] = present[0]
+
+    aligned = []
+    for frame in frames:
+        missing = {col: _empty_column(dtypes[col], frame.index) for col in columns if col not in frame.columns}
+        if missing:
+            frame = frame.assign(**missing)
+        recode = {
+            col: dtype for col, dtype in dtypes.items()
+            if isinstance(dtype, pd.CategoricalDtype) and frame[col].dtype != dtype
+        }
+        if recode:
+            frame = frame.astype(recode)
+        aligned.append(frame[columns])
+    return pd.concat(aligned, ignore_index=True)
+
+def memory_report(before: pd.DataFrame, after: pd.DataFrame) -> dict:
+    """Pemakaian memori (MB, deep) sebelum dan sesudah konversi, per kolom dan total."""
+    before_cols = before.memory_usage(deep=True, index=False) / 2**20
+    after_cols = after.memory_usage(deep=True, index=False) / 2**20
+    return {
+        'before_mb': float(before_cols.sum()),
+        'after_mb': float(after_cols.sum()),
+        'ratio': float(before_cols.sum() / after_cols.sum()) if after_cols.sum() else None,
+        'columns': {
+            col: {'before_mb': float(before_cols[col]), 'after_mb': float(after_cols.get(col, 0.0)), 'dtype': str(after[col].dtype)}
+            for col in before.columns
+        },
+    }
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+
+DEFAULT_SCORE = 3  # skor untuk jawaban kosong / di luar skala
+
+EASE_SCALE = {'Sangat Mudah': 5, 'Mudah': 4, 'Biasa': 3, 'Sulit': 2, 'Sangat Sulit': 1}
+
+# Skala per pertanyaan. Label yang sama ('Biasa') bisa berarti hal berbeda di
+# pertanyaan berbeda, jadi mapping tidak boleh digabung jadi satu dict global.
+QUESTION_SCALES = {
+    'topup_score': EASE_SCALE,
+    'transfer_score': EASE_SCALE,
+    'split_score': EASE_SCALE,
+    'shared_score': EASE_SCALE,
+    'ui_navigasi': {'Sangat Intuitif': 5, 'Cukup Jelas': 3, 'Membingungkan': 1},
+    'ui_performa': {'Cepat': 5, 'Biasa': 3, 'Lambat': 1},
+    'kepuasan_akhir': {'Sangat Kecewa': 1, 'Kecewa': 2, 'Biasa': 3, 'Puas': 4, 'Sangat Puas': 5},
+}
+
+# Kolom jawaban -> kolom skor yang dipakai dashboard.
+SCORE_COLUMNS = {
+    'topup_score': 'score_topup',
+    'transfer_score': 'score_transfer',
+    'split_score': 'score_split',
+    'shared_score': 'score_shared',
+    'kepuasan_akhir': 'score_satisfaction',
+    'ui_navigasi': 'score_navigasi',
+    'ui_performa': 'score_performa',
+}
+
+def to_categorical(series: pd.Series) -> pd.Series:
+    """Konversi kolom jawaban ke dtype category (no-op jika sudah category)."""
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        return series
+    return series.astype('category')
+
+def score_series(series: pd.Series, scale: dict) -> pd.Series:
+    """Map satu kolom jawaban ke skor int8 lewat lookup kode kategori."""
+    cat = to_categorical(series)
+    # Elemen terakhir menangkap kode -1 (NaN) sehingga kosong -> DEFAULT_SCORE.
+    lookup = np.array(
+        [scale.get(label, DEFAULT_SCORE) for label in cat.cat.categories] + [DEFAULT_SCORE],
+        dtype=np.int8,
+    )
+    return pd.Series(lookup[cat.cat.codes.to_numpy()], index=series.index, dtype=np.int8)
+
+def score_responses(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Kembalikan salinan df dengan kolom jawaban Likert sebagai category dan
+    kolom skor int8 (lihat SCORE_COLUMNS). Kolom yang tidak ada diisi DEFAULT_SCORE.
+    """
+    scored = df.copy()
+    for question, score_col in SCORE_COLUMNS.items():
+        if question not in scored.columns:
+            scored[score_col] = np.int8(DEFAULT_SCORE)
+            continue
+        scored[question] = to_categorical(scored[question])
+        scored[score_col] = score_series(scored[question], QUESTION_SCALES[question])
+    return scored
@@ -0,0 +1,275 @@
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+SHARED_STATE_PATH = os.getenv("SHARED_STATE_PATH") or "survey_shared.db"
+DEFAULT_LEASE = 60.0  # detik sebelum job yang diklaim worker mati boleh diklaim ulang
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS kv (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    version INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS generations (
+    name TEXT PRIMARY KEY,
+    gen INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    queue TEXT NOT NULL,
+    payload BLOB NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    not_before REAL NOT NULL DEFAULT 0,
+    claimed_until REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_queue ON jobs (queue, id);
+CREATE TABLE IF NOT EXISTS unique_keys (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID;
+"""
+
+class SharedStore:
+    """
+    State yang dibagi semua worker Streamlit di satu host, disimpan di SQLite
+    mode WAL (pembaca tidak memblokir penulis):
+
+    - kv: nilai (pickle) dengan nomor versi, dipakai snapshot dataset, rollup
+      dan indeks kata agar hasil satu proses dipakai ulang proses lain;
+    - generations: counter yang dinaikkan untuk broadcast invalidasi cache;
+    - jobs: antrian durable (write buffer, email) dengan klaim ber-lease, jadi
+      job milik worker yang mati diambil alih worker lain;
+    - unique_keys: himpunan key per namespace dengan insert atomik (idempotensi).
+
+    Koneksi dibuat per thread; commit memakai synchronous=FULL sehingga job
+    yang sudah di-push bertahan walau proses mati.
+    """
+
+    def __init__(self, path=SHARED_STATE_PATH):
+        self.path = path
+        self._local = threading.local()
+        self._conn().executescript(_SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=FULL")
+            self._local.conn = conn
+        return conn
+
+    def _write(self, fn):
+        """Jalankan fn(conn) dalam satu transaksi tulis (BEGIN IMMEDIATE)."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            result = fn(conn)
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+        return result
+
+    # --- kv ---
+
+    def version(self, key):
+        row = self._conn().execute("SELECT version FROM kv WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def get(self, key, default=None):
+        """(versi, nilai) untuk key, atau (None, default) jika belum ada."""
+        row = self._conn().execute("SELECT version, value FROM kv WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None, default
+        return row[0], pickle.loads(row[1])
+
+    def set(self, key, value) -> int:
+        """Simpan nilai dan naikkan versinya. Return versi baru."""
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        return self._write(lambda conn: conn.execute(
+            "INSERT INTO kv (key, value, version) VALUES (?, ?, 1) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value, version = kv.version + 1 "
+            "RETURNING version", (key, blob),
+        ).fetchone()[0])
+
+    def set_many(self, items: dict):
+        """Simpan beberapa nilai sekaligus dalam satu commit."""
+        rows = [(key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)) for key, value in items.items()]
+        self._write(lambda conn: conn.executemany(
+            "INSERT INTO kv (key, value, version) VALUES (?, ?, 1) "
+            "ON CONFLICT (key) DO UPDATE SET value = excluded.value, version = kv.version + 1", rows,
+        ))
+
+    def get_many(self, keys) -> dict:
+        """{key: nilai} untuk key yang ada (key yang tidak ada dilewati)."""
+        keys = list(keys)
+        values = {}
+        for i in range(0, len(keys), 500):  # batas parameter SQLite
+            chunk = keys[i:i + 500]
+            rows = self._conn().execute(
+                f"SELECT key, value FROM kv WHERE key IN ({','.join('?' * len(chunk))})", chunk,
+            ).fetchall()
+            values.update((key, pickle.loads(value)) for key, value in rows)
+        return values
+
+    def compare_and_set(self, key, expected_version, items: dict, delete=()):
+        """
+        Tulis `items` (boleh termasuk `key`) dan hapus `delete` dalam satu commit,
+        hanya jika versi `key` masih `expected_version` (None = belum ada).
+        Return versi baru `key`, atau None jika proses lain sudah mengubahnya.
+        """
+        rows = [(k, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)) for k, value in items.items()]
+
+        def run(conn):
+            row = conn.execute("SELECT version FROM kv WHERE key = ?", (key,)).fetchone()
+            if (row[0] if row else None) != expected_version:
+                return None
+            conn.executemany("DELETE FROM kv WHERE key = ?", [(k,) for k in delete])
+            conn.executemany(
+                "INSERT INTO kv (key, value, version) VALUES (?, ?, 1) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value, version = kv.version + 1", rows,
+            )
+            row = conn.execute("SELECT version FROM kv WHERE key = ?", (key,)).fetchone()
+            return row[0] if row else None
+        return self._write(run)
+
+    def delete(self, *keys):
+        self._write(lambda conn: conn.executemany("DELETE FROM kv WHERE key = ?", [(key,) for key in keys]))
+
+    def delete_prefix(self, prefix):
+        """Hapus semua key yang diawali `prefix`."""
+        self._write(lambda conn: conn.execute("DELETE FROM kv WHERE substr(key, 1, ?) = ?", (len(prefix), prefix)))
+
+    def items(self, prefix) -> list:
+        """[(key, nilai)] untuk semua key yang diawali `prefix`."""
+        rows = self._conn().execute(
+            "SELECT key, value FROM kv WHERE substr(key, 1, ?) = ?", (len(prefix), prefix),
+        ).fetchall()
+        return [(key, pickle.loads(value)) for key, value in rows]
+
+    def incr(self, key, amount=1) -> int:
+        """Counter atomik antar proses (disimpan di kv)."""
+        def run(conn):
+            row = conn.execute("SELECT value FROM kv WHERE key = ?", (key,)).fetchone()
+            value = (pickle.loads(row[0]) if row else 0) + amount
+            conn.execute(
+                "INSERT INTO kv (key, value, version) VALUES (?, ?, 1) "
+                "ON CONFLICT (key) DO UPDATE SET value = excluded.value, version = kv.version + 1",
+                (key, pickle.dumps(value)),
+            )
+            return value
+        return self._write(run)
+
+    # --- invalidasi ---
+
+    def generation(self, name) -> int:
+        row = self._conn().execute("SELECT gen FROM generations WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else 0
+
+    def bump(self, name) -> int:
+        """Naikkan generation `name`; proses lain melihat nilai baru pada pengecekan berikutnya."""
+        return self._write(lambda conn: conn.execute(
+            "INSERT INTO generations (name, gen) VALUES (?, 1) "
+            "ON CONFLICT (name) DO UPDATE SET gen = gen + 1 RETURNING gen", (name,),
+        ).fetchone()[0])
+
+    # --- himpunan key unik ---
+
+    def add_unique(self, namespace, key) -> bool:
+        """Tambahkan key; False jika key sudah ada (oleh proses mana pun)."""
+        return self._write(lambda conn: conn.execute(
+            "INSERT OR IGNORE INTO unique_keys (namespace, key) VALUES (?, ?)", (namespace, key),
+        ).rowcount == 1)
+
+    def discard_unique(self, namespace, key):
+        self._write(lambda conn: conn.execute(
+            "DELETE FROM unique_keys WHERE namespace = ? AND key = ?", (namespace, key),
+        ))
+
+    def has_unique(self, namespace, key) -> bool:
+        return self._conn().execute(
+            "SELECT 1 FROM unique_keys WHERE namespace = ? AND key = ?", (namespace, key),
+        ).fetchone() is not None
+
+    def unique_keys(self, namespace) -> list:
+        return [row[0] for row in self._conn().execute(
+            "SELECT key FROM unique_keys WHERE namespace = ?", (namespace,),
+        )]
+
+    # --- antrian job ---
+
+    def push(self, queue, payloads):
+        """Masukkan satu atau beberapa payload ke antrian dalam satu commit."""
+        blobs = [(queue, pickle.dumps(p, protocol=pickle.HIGHEST_PROTOCOL)) for p in payloads]
+        self._write(lambda conn: conn.executemany("INSERT INTO jobs (queue, payload) VALUES (?, ?)", blobs))
+
+    def claim(self, queue, limit=1, lease=DEFAULT_LEASE) -> list:
+        """Klaim hingga `limit` job siap (urut masuk). Return [(id, payload, attempts)]."""
+        def run(conn):
+            now = time.time()
+            rows = conn.execute(
+                "SELECT id, payload, attempts FROM jobs WHERE queue = ? AND not_before <= ? "
+                "AND (claimed_until IS NULL OR claimed_until < ?) ORDER BY id LIMIT ?",
+                (queue, now, now, limit),
+            ).fetchall()
+            conn.executemany("UPDATE jobs SET claimed_until = ? WHERE id = ?", [(now + lease, r[0]) for r in rows])
+            return [(r[0], pickle.loads(r[1]), r[2]) for r in rows]
+        return self._write(run)
+
+    def ack(self, job_ids):
+        """Hapus job yang sudah selesai."""
+        self._write(lambda conn: conn.executemany("DELETE FROM jobs WHERE id = ?", [(i,) for i in job_ids]))
+
+    def release(self, job_ids, delay=0.0, count_attempt=False):
+        """Lepas klaim agar job bisa diambil lagi setelah `delay` detik."""
+        not_before = time.time() + delay
+        self._write(lambda conn: conn.executemany(
+            "UPDATE jobs SET claimed_until = NULL, not_before = ?, attempts = attempts + ? WHERE id = ?",
+            [(not_before, int(count_attempt), i) for i in job_ids],
+        ))
+
+    def extend(self, job_ids, lease=DEFAULT_LEASE):
+        """Perpanjang klaim job yang masih diklaim hingga `lease` detik dari sekarang."""
+        claimed_until = time.time() + lease
+        self._write(lambda conn: conn.executemany(
+            "UPDATE jobs SET claimed_until = ? WHERE id = ? AND claimed_until IS NOT NULL",
+            [(claimed_until, i) for i in job_ids],
+        ))
+
+    def reset_claims(self, queue):
+        """Lepas semua klaim di antrian (untuk konsumen tunggal yang mengambil alih dari worker yang mati)."""
+        self._write(lambda conn: conn.execute(
+            "UPDATE jobs SET claimed_until = NULL WHERE queue = ? AND claimed_until IS NOT NULL", (queue,),
+        ))
+
+    def move(self, job_ids, queue, reset_attempts=False):
+        """Pindahkan job ke antrian lain (mis. dead-letter) dalam satu commit, klaimnya dilepas."""
+        self._write(lambda conn: conn.executemany(
+            "UPDATE jobs SET queue = ?, claimed_until = NULL, not_before = 0, "
+            "attempts = CASE WHEN ? THEN 0 ELSE attempts END WHERE id = ?",
+            [(queue, int(reset_attempts), i) for i in job_ids],
+        ))
+
+    def queue_counts(self, queue) -> dict:
+        """Jumlah job: total, siap dikirim, dan menunggu retry."""
+        now = time.time()
+        total, waiting = self._conn().execute(
+            "SELECT COUNT(*), COALESCE(SUM(not_before > ?), 0) FROM jobs WHERE queue = ?", (now, queue),
+        ).fetchone()
+        return {"total": total, "ready": total - waiting, "waiting": waiting}
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_store() -> SharedStore:
+    """Store tunggal per proses (semua proses membuka file SQLite yang sama)."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SharedStore()
+        return _store
@@ -0,0 +1,216 @@
+"""
+Snapshot dashboard admin: KPI, figure plotly (JSON) dan word cloud (PNG)
+dirender sekali per generation data "responses" ke bundle berversi di disk.
+Halaman admin hanya memuat bundle terbaru, jadi banyak admin yang membuka
+dashboard bersamaan tidak merender ulang chart.
+
+    python snapshot.py            # bangun bundle untuk data terbaru
+    python snapshot.py --watch    # perbarui terus setiap ada data baru
+
+Layout:
+    SNAPSHOT_DIR/LATEST                       nama bundle terbaru
+    SNAPSHOT_DIR/<versi>/manifest.json        generation, jumlah baris, KPI
+    SNAPSHOT_DIR/<versi>/<chart>.json         figure plotly
+    SNAPSHOT_DIR/<versi>/<wordcloud>.png
+"""
+import argparse
+import json
+import os
+import shutil
+import threading
+import time
+from datetime import datetime
+
+from file_lock import file_lock
+from shared_state import get_store
+
+SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR") or "dashboard_snapshots"
+POLL_INTERVAL = float(os.getenv("SNAPSHOT_POLL_INTERVAL") or 5)  # detik antar cek generation
+KEEP_BUNDLES = 3
+FEATURE_COLUMNS = ['score_topup', 'score_transfer', 'score_split', 'score_shared']
+WORDCLOUDS = {
+    'wordcloud_trx': ('topup_feedback', 'transfer_feedback'),
+    'wordcloud_final': ('pesan_akhir',),
+}
+
+def compute_kpis(summary) -> dict:
+    total = summary['total']
+    means = summary['means']
+    return {
+        'total': total,
+        'satisfaction': means['score_satisfaction'],
+        'retention_pct': (summary['retention_count'] / total) * 100 if total > 0 else 0,
+        'top_feature': max(FEATURE_COLUMNS, key=lambda col: means[col]).replace('score_', '').title(),
+    }
+
+def build_figures(summary) -> dict:
+    """Radar skor fitur, bar distribusi kepuasan dan pie niat penggunaan."""
+    import pandas as pd
+    import plotly.express as px
+    import plotly.graph_objects as go
+
+    means = summary['means']
+    radar = go.Figure(data=go.Scatterpolar(
+        r=[means[col] for col in FEATURE_COLUMNS + ['score_navigasi', 'score_performa']],
+        theta=['Top Up', 'Transfer', 'Split Bill', 'Shared Wallet', 'Navigasi UI', 'Performa App'],
+        fill='toself',
+        name='Rata-rata Skor'
+    ))
+    radar.update_layout(
+        polar=dict(radialaxis=dict(visible=True, range=[0, 5])),
+        showlegend=False,
+        height=400
+    )
+
+    sat_counts = pd.DataFrame(list(summary['histograms']['kepuasan_akhir'].items()), columns=['Kepuasan', 'Jumlah'])
+    bar = px.bar(sat_counts, x='Kepuasan', y='Jumlah', color='Jumlah', color_continuous_scale='Oranges')
+
+    use_counts = summary['histograms']['niat_penggunaan']
+    pie = px.pie(values=list(use_counts.values()), names=list(use_counts), hole=0.4)
+    pie.update_layout(height=250, margin=dict(t=0, b=0, l=0, r=0))
+    return {'radar': radar, 'bar': bar, 'pie': pie}
+
+def _write_atomic(path, data: bytes):
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+def _latest_lock():
+    return file_lock(os.path.join(SNAPSHOT_DIR, ".lock"))
+
+def latest_version():
+    """Nama bundle terbaru, atau None jika belum ada."""
+    try:
+        with open(os.path.join(SNAPSHOT_DIR, "LATEST"), encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+def load_bundle(version) -> dict:
+    """Isi bundle: manifest + 'figures' (JSON string) + 'images' (PNG bytes atau None)."""
+    directory = os.path.join(SNAPSHOT_DIR, version)
+    with open(os.path.join(directory, "manifest.json"), encoding="utf-8") as f:
+        bundle = json.load(f)
+    figures = {}
+    for name in bundle['figures']:
+        with open(os.path.join(directory, f"{name}.json"), encoding="utf-8") as f:
+            figures[name] = f.read()
+    images = {}
+    for name, filename in bundle['images'].items():
+        if filename is None:
+            images[name] = None
+        else:
+            with open(os.path.join(directory, filename), "rb") as f:
+                images[name] = f.read()
+    return dict(bundle, figures=figures, images=images)
+
+def _prune():
+    latest = latest_version()
+    bundles = sorted(name for name in os.listdir(SNAPSHOT_DIR)
+                     if os.path.isdir(os.path.join(SNAPSHOT_DIR, name)) and not name.startswith("."))
+    for name in bundles[:-KEEP_BUNDLES]:
+        if name != latest:
+            shutil.rmtree(os.path.join(SNAPSHOT_DIR, name), ignore_errors=True)
+
+def build_bundle(generation=None) -> str:
+    """Render semua artefak dashboard ke bundle baru dan jadikan LATEST. Return versi bundle."""
+    from storage import fetch_all_responses, fetch_summary
+    from wordfreq import WordFrequencyIndex
+
+    if generation is None:
+        generation = get_store().generation("responses")
+    df = fetch_all_responses()
+    summary = fetch_summary()
+    index = WordFrequencyIndex()
+    index.update(df)
+
+    version = f"{generation:08d}-{time.time_ns()}"
+    tmp_dir = os.path.join(SNAPSHOT_DIR, f".{version}.tmp")
+    os.makedirs(tmp_dir)
+    try:
+        figures = build_figures(summary) if summary['total'] else {}
+        for name, figure in figures.items():
+            _write_atomic(os.path.join(tmp_dir, f"{name}.json"), figure.to_json().encode())
+        images = {}
+        for name, fields in WORDCLOUDS.items():
+            png = index.render_png(fields)
+            images[name] = f"{name}.png" if png else None
+            if png:
+                _write_atomic(os.path.join(tmp_dir, f"{name}.png"), png)
+        manifest = {
+            'version': version,
+            'generation': generation,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'rows': len(df),
+            'kpis': compute_kpis(summary) if summary['total'] else None,
+            'figures': list(figures),
+            'images': images,
+        }
+        _write_atomic(os.path.join(tmp_dir, "manifest.json"), json.dumps(manifest).encode())
+        os.replace(tmp_dir, os.path.join(SNAPSHOT_DIR, version))
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+    with _latest_lock():
+        current = latest_version()
+        if current is None or current < version:  # build lebih lama yang selesai belakangan tidak menimpa
+            _write_atomic(os.path.join(SNAPSHOT_DIR, "LATEST"), version.encode())
+    _prune()
+    return version
+
+def latest_generation():
+    version = latest_version()
+    return int(version.split("-")[0]) if version else None
+
+def refresh_if_stale() -> bool:
+    """Bangun bundle jika generation data sudah melewati bundle terbaru. Satu worker per generation."""
+    store = get_store()
+    generation = store.generation("responses")
+    latest = latest_generation()
+    if latest is not None and latest >= generation:
+        return False
+    if not store.add_unique("snapshots", str(generation)):
+        return False  # sedang/sudah dibangun worker lain
+    try:
+        build_bundle(generation)
+        return True
+    except Exception as e:
+        store.discard_unique("snapshots", str(generation))
+        print("Snapshot build failed:", e)
+        return False
+
+_worker = None
+_worker_lock = threading.Lock()
+
+def start_snapshot_worker(poll_interval=POLL_INTERVAL):
+    """Thread background yang memperbarui bundle setiap ada data baru (idempoten per proses)."""
+    global _worker
+
+    def run():
+        while True:
+            refresh_if_stale()
+            time.sleep(poll_interval)
+
+    with _worker_lock:
+        if _worker is None:
+            os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+            _worker = threading.Thread(target=run, name="dashboard-snapshot", daemon=True)
+            _worker.start()
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--watch", action="store_true", help="perbarui terus setiap ada data baru")
+    args = parser.parse_args()
+
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    if not args.watch:
+        print("Bundle:", build_bundle())
+        return
+    while True:
+        if refresh_if_stale():
+            print("Bundle:", latest_version())
+        time.sleep(POLL_INTERVAL)
+
+if __name__ == "__main__":
+    main()
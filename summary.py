@@ -0,0 +1,68 @@
+from collections import Counter
+
+import pandas as pd
+
+from scoring import DEFAULT_SCORE, QUESTION_SCALES, SCORE_COLUMNS
+
+# Pertanyaan pilihan tertutup yang diringkas jadi histogram jawaban.
+SUMMARY_QUESTIONS = list(QUESTION_SCALES) + ['niat_penggunaan']
+
+class ResponseSummary:
+    """
+    Ringkasan agregat respon: jumlah total dan histogram jawaban per pertanyaan.
+    Rata-rata skor dan retention dihitung dari histogram, jadi ringkasan bisa
+    diperbarui inkremental (tambah baris/histogram baru) tanpa data mentah.
+    """
+
+    def __init__(self):
+        self.total = 0
+        self.histograms = {q: Counter() for q in SUMMARY_QUESTIONS}
+
+    def add_records(self, records):
+        """Tambahkan baris respon (dict pertanyaan -> jawaban)."""
+        for record in records:
+            self.total += 1
+            for q in SUMMARY_QUESTIONS:
+                answer = record.get(q)
+                if isinstance(answer, str) and answer:
+                    self.histograms[q][answer] += 1
+
+    def add_histograms(self, total, histograms):
+        """Gabungkan hasil agregasi server-side {pertanyaan: {jawaban: jumlah}}."""
+        self.total += total
+        for q, counts in histograms.items():
+            self.histograms[q].update(counts)
+
+    def means(self) -> dict:
+        """Rata-rata skor per kolom skor (jawaban kosong dihitung DEFAULT_SCORE)."""
+        result = {}
+        for q, score_col in SCORE_COLUMNS.items():
+            if not self.total:
+                result[score_col] = float('nan')
+                continue
+            scale = QUESTION_SCALES[q]
+            answered = sum(self.histograms[q].values())
+            score_sum = sum(scale.get(a, DEFAULT_SCORE) * n for a, n in self.histograms[q].items())
+            result[score_col] = (score_sum + DEFAULT_SCORE * (self.total - answered)) / self.total
+        return result
+
+    def retention_count(self) -> int:
+        return sum(n for a, n in self.histograms['niat_penggunaan'].items() if 'Ya' in a)
+
+    def to_dict(self) -> dict:
+        return {
+            'total': self.total,
+            'histograms': {q: dict(c.most_common()) for q, c in self.histograms.items()},
+            'means': self.means(),
+            'retention_count': self.retention_count(),
+        }
+
+def summarize_frame(df: pd.DataFrame) -> dict:
+    """Ringkasan dari DataFrame (untuk backend tanpa agregasi server-side)."""
+    summary = ResponseSummary()
+    summary.total = len(df)
+    for q in SUMMARY_QUESTIONS:
+        if q in df.columns:
+            counts = df[q].value_counts()
+            summary.histograms[q].update({a: int(n) for a, n in counts.items() if isinstance(a, str) and a and n})
+    return summary.to_dict()
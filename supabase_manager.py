@@ -1,43 +1,295 @@
-from supabase import create_client
 import os
+import threading
+import uuid
 from dotenv import load_dotenv
 from datetime import datetime
 import pandas as pd
+from admission import get_gate
+from shared_state import get_store
+from write_buffer import WriteBuffer
+from summary import SUMMARY_QUESTIONS, ResponseSummary
+from schema import concat_compact
+from response_model import decode_rows, pack_data, unpack_data
 load_dotenv()
 SUPABASE_URL = os.getenv("SUPABASE_URL")
 SUPABASE_KEY = os.getenv("SUPABASE_KEY")
-supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
+
+# Client dibuat saat pertama dipakai, bukan saat import: stack supabase
+# (httpx, gotrue, postgrest, ...) mahal di-import dan tidak dibutuhkan
+# sampai ada submit atau admin membaca data.
+_client = None
+_client_lock = threading.Lock()
+
+TABLE_NAME = "survey_responses"
+PAGE_SIZE = 1000
+JOURNAL_PATH = os.getenv("SURVEY_JOURNAL") or "survey_journal.jsonl"  # journal format lama, diimpor sekali
+
+# Snapshot hasil sync terakhir. Cursor = id baris terakhir yang sudah ditarik,
+# dipakai untuk keyset pagination pada sync berikutnya. id diberikan server
+# saat insert, bukan timestamp dari client: respon yang masuk terlambat lewat
+# write buffer atau replay (timestamp lama) tetap berada di belakang cursor.
+#
+# Snapshot dibagi antar worker lewat shared store sebagai head kecil di
+# SNAPSHOT_KEY ({epoch, cursor, rows, segments}) plus segmen frame ringkas
+# per rentang baris. Sync hanya menulis segmen delta; segmen yang sama besar
+# digabung (seperti counter biner) sehingga jumlahnya tetap O(log n). Worker
+# lain hanya membaca segmen setelah jumlah baris lokalnya. Epoch baru dibuat
+# saat full refresh; baris dengan epoch sama tersusun sama (urut id).
+SNAPSHOT_KEY = "supabase.snapshot"
+SEGMENT_PREFIX = "supabase.snapshot.segment:"
+_snapshot = {"frame": pd.DataFrame(), "cursor": None, "version": None, "epoch": None, "head": None}
+_snapshot_lock = threading.Lock()
+
+# Ringkasan agregat dengan cursor sendiri; hanya kolom jawaban yang ditarik.
+SUMMARY_KEY = "supabase.summary"
+_summary = {"summary": ResponseSummary(), "cursor": None, "version": None}
+_summary_lock = threading.Lock()
+
+def _reset_summary():
+    _summary.update(summary=ResponseSummary(), cursor=None, version=None)
+
+def _adopt_shared(key, state, reset):
+    """
+    Ganti state lokal dengan versi di shared store jika worker lain sudah
+    menerbitkan yang lebih baru. Jika key dihapus (clear_shared_snapshot setelah
+    dedup) atau versinya lebih lama dari milik proses ini (diterbitkan ulang
+    dari awal), state lokal tidak berlaku lagi: `reset()` dipanggil dulu.
+    """
+    store = get_store()
+    current = store.version(key)
+    if current == state["version"]:
+        return
+    if current is None or (state["version"] is not None and current < state["version"]):
+        reset()
+        if current is None:
+            return
+    version, value = store.get(key)
+    if isinstance(value.get("cursor"), tuple):
+        return  # format lama dengan cursor (timestamp, id): diganti saat sync berikutnya diterbitkan
+    state.update(value, version=version)
+
+def _publish_shared(key, state, fields):
+    state["version"] = get_store().set(key, {field: state[field] for field in fields})
+
+def get_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            from supabase import create_client
+            _client = create_client(SUPABASE_URL, SUPABASE_KEY)
+        return _client
+
+def insert_responses(payloads: list):
+    """Bulk insert beberapa payload sekaligus. Raise jika gagal (dipakai write buffer)."""
+    # Antrian menyimpan 'data' sebagai msgpack; payload lama/replay masih berupa dict.
+    payloads = [dict(p, data=unpack_data(p["data"])) for p in payloads]
+    get_client().table(TABLE_NAME).insert(payloads).execute()
+    get_store().bump("responses")  # cache dashboard di semua worker kedaluwarsa
+
+write_buffer = WriteBuffer(get_store(), insert_responses, queue="responses", legacy_journal=JOURNAL_PATH, gate="db")
 
 def save_survey_response(data: dict):
-    """Insert sebagai JSON ke kolom 'data'."""
+    """
+    Simpan respon sebagai JSON ke kolom 'data'. Payload ditulis ke antrian
+    durable di shared store (data dikemas msgpack, lihat response_model) dan
+    dikirim ke Supabase oleh write buffer; insert langsung hanya dipakai jika
+    antrian tidak bisa ditulis.
+    """
     payload = {
         "timestamp": datetime.utcnow().isoformat(),
-        "data": data 
+        "data": pack_data(data)
     }
 
     try:
-        supabase.table("survey_responses").insert(payload).execute()
+        write_buffer.append(payload)
+        return True
+    except Exception as e:
+        print("Write buffer append failed:", e)
+
+    try:
+        get_gate("db").run(lambda: insert_responses([payload]) or True)
         return True
     except Exception as e:
         print("Supabase insert failed:", e)
         return False
-def fetch_all_responses():
-    """Fetch all survey responses as a pandas DataFrame."""
-    try:
-        res = supabase.table("survey_responses").select("*").execute()
-        rows = res.data or []
 
-        if not rows:
-            return pd.DataFrame()
+def _iter_pages(cursor=None, page_size=PAGE_SIZE, columns="id,timestamp,data", start=None, end=None):
+    """Yield halaman baris (urut id) dengan id > cursor, opsional dalam rentang timestamp [start, end)."""
+    while True:
+        query = (
+            get_client().table(TABLE_NAME)
+            .select(columns)
+            .order("id")
+            .limit(page_size)
+        )
+        if start:
+            query = query.gte("timestamp", start)
+        if end:
+            query = query.lt("timestamp", end)
+        if cursor:
+            query = query.gt("id", cursor)
 
-        records = []
-        for row in rows:
-            entry = row["data"].copy()
-            entry["timestamp"] = row["timestamp"]  # include timestamp from table
-            records.append(entry)
+        page = query.execute().data or []
+        if page:
+            yield page
+        if len(page) < page_size:
+            return
+        cursor = page[-1]["id"]
 
-        return pd.DataFrame(records)
+def _rows_to_frame(rows):
+    """Bangun DataFrame bertipe dari baris Supabase lewat decoder kolumnar (dengan migrasi skema)."""
+    return decode_rows([row["data"] for row in rows], [row["timestamp"] for row in rows])  # include timestamp from table
 
-    except Exception as e:
-        print("Fetch error:", e)
-        return pd.DataFrame()
\ No newline at end of file
+def _adopt_snapshot():
+    """Tambahkan baris yang sudah diterbitkan worker lain: hanya segmen setelah baris lokal yang dibaca."""
+    store = get_store()
+    if store.version(SNAPSHOT_KEY) in (None, _snapshot["version"]):
+        return
+    version, head = store.get(SNAPSHOT_KEY)
+    if not isinstance(head, dict) or "segments" not in head:
+        # Format lama (seluruh frame di satu key): ditimpa saat sync berikutnya diterbitkan.
+        _snapshot.update(version=version, head=None)
+        return
+
+    frame = _snapshot["frame"]
+    local = len(frame) if head["epoch"] == _snapshot["epoch"] else 0
+    if head["rows"] > local:
+        needed, start = [], 0
+        for key, rows in head["segments"]:
+            if start + rows > local:
+                needed.append((key, start))
+            start += rows
+        values = store.get_many(key for key, _ in needed)
+        if len(values) < len(needed):
+            return  # head diganti worker lain saat dibaca: pakai state lokal, coba lagi sync berikutnya
+        parts = [values[key].iloc[max(local - start, 0):] for key, start in needed]
+        frame = concat_compact([frame if local else pd.DataFrame(), *parts])
+        _snapshot.update(frame=frame, cursor=head["cursor"], epoch=head["epoch"])
+    # head["rows"] <= local: worker ini sudah di depan; publish berikutnya menambah segmen dari sini.
+    _snapshot.update(version=version, head=head)
+
+def _publish_snapshot():
+    """Terbitkan baris lokal yang belum ada di head sebagai segmen delta (compare-and-set pada versi head)."""
+    frame = _snapshot["frame"]
+    head = _snapshot["head"]
+    if head is None or head["epoch"] != _snapshot["epoch"]:
+        segments, published = [], 0
+    elif len(frame) <= head["rows"]:
+        return
+    else:
+        segments, published = list(head["segments"]), head["rows"]
+
+    # (key, start, rows); segmen dengan ukuran <= segmen sesudahnya digabung.
+    bounds, start = [], 0
+    for key, rows in segments:
+        bounds.append((key, start, rows))
+        start += rows
+    bounds.append((None, published, len(frame) - published))
+    while len(bounds) >= 2 and bounds[-2][2] <= bounds[-1][2]:
+        _, merged_start, rows = bounds.pop(-2)
+        bounds[-1] = (None, merged_start, rows + bounds[-1][2])
+
+    epoch = _snapshot["epoch"]
+    items = {}
+    for i, (key, start, rows) in enumerate(bounds):
+        if key is None:
+            key = f"{SEGMENT_PREFIX}{epoch}:{start}-{start + rows}"
+            items[key] = frame.iloc[start:start + rows]
+            bounds[i] = (key, start, rows)
+    new_head = {
+        "epoch": epoch, "cursor": _snapshot["cursor"], "rows": len(frame),
+        "segments": [(key, rows) for key, _, rows in bounds],
+    }
+    kept = {key for key, _, _ in bounds}
+    stale = [key for key, _ in (head or {}).get("segments", []) if key not in kept]
+    items[SNAPSHOT_KEY] = new_head
+    version = get_store().compare_and_set(SNAPSHOT_KEY, _snapshot["version"], items, delete=stale)
+    if version is not None:  # None: worker lain menerbitkan lebih dulu, diadopsi pada sync berikutnya
+        _snapshot.update(version=version, head=new_head)
+
+def clear_shared_snapshot():
+    """Hapus snapshot dan ringkasan bersama (mis. setelah baris dihapus di server)."""
+    store = get_store()
+    store.delete(SNAPSHOT_KEY, SUMMARY_KEY)
+    store.delete_prefix(SEGMENT_PREFIX)
+
+def fetch_all_responses(full_refresh: bool = False):
+    """
+    Fetch all survey responses as a pandas DataFrame.
+
+    Secara default hanya menarik baris baru sejak sync terakhir lalu
+    menggabungkannya ke snapshot lokal. `full_refresh=True` membuang snapshot
+    dan menarik ulang seluruh tabel. Snapshot disimpan bertipe ringkas
+    (lihat schema.concat_compact) dan dibagi antar worker lewat shared store.
+    """
+    with _snapshot_lock:
+        if full_refresh:
+            # Epoch baru; head yang ada sekarang ditimpa dan semua segmennya dihapus saat publish.
+            version, head = get_store().get(SNAPSHOT_KEY)
+            if not isinstance(head, dict) or "segments" not in head:
+                head = None
+            _snapshot.update(frame=pd.DataFrame(), cursor=None, epoch=uuid.uuid4().hex, version=version, head=head)
+
+        try:
+            if not full_refresh:
+                _adopt_snapshot()
+            if _snapshot["epoch"] is None:
+                _snapshot["epoch"] = uuid.uuid4().hex
+            cursor = _snapshot["cursor"]
+            frames = []
+            for page in _iter_pages(cursor):
+                frames.append(_rows_to_frame(page))
+                cursor = page[-1]["id"]
+
+            if frames:
+                _snapshot["frame"] = concat_compact([_snapshot["frame"], *frames])
+                _snapshot["cursor"] = cursor
+            if frames or full_refresh:
+                _publish_snapshot()
+
+        except Exception as e:
+            print("Fetch error:", e)
+
+        return _snapshot["frame"].copy()
+
+def fetch_summary(full_refresh: bool = False):
+    """
+    Ringkasan agregat (histogram jawaban, rata-rata skor, retention) yang
+    diperbarui inkremental: tiap panggilan hanya menarik baris baru, dan hanya
+    field jawaban pilihan tertutup (data->>kolom), bukan seluruh blob JSON.
+    `full_refresh=True` menghitung ulang dari seluruh tabel (mis. setelah dedup).
+    """
+    columns = "id,timestamp," + ",".join(f"{q}:data->>{q}" for q in SUMMARY_QUESTIONS)
+    with _summary_lock:
+        try:
+            if full_refresh:
+                version = _summary["version"]
+                _reset_summary()
+                _summary["version"] = version  # publish di bawah menimpa ringkasan bersama
+            else:
+                _adopt_shared(SUMMARY_KEY, _summary, _reset_summary)
+            start_cursor = cursor = _summary["cursor"]
+            for page in _iter_pages(cursor, columns=columns):
+                _summary["summary"].add_records(page)
+                cursor = page[-1]["id"]
+                _summary["cursor"] = cursor
+            if cursor != start_cursor or full_refresh:
+                _publish_shared(SUMMARY_KEY, _summary, ("summary", "cursor"))
+        except Exception as e:
+            print("Summary fetch error:", e)
+        return _summary["summary"].to_dict()
+
+def iter_responses(columns=None, start=None, end=None, chunk_size=PAGE_SIZE):
+    """
+    Yield respon per chunk DataFrame langsung dari Supabase (untuk export),
+    tanpa menyentuh snapshot. `columns` diproyeksikan di server lewat data->>kolom.
+    """
+    if columns:
+        fields = ["id", "timestamp"] + [f"{c}:data->>{c}" for c in columns if c != "timestamp"]
+        select = ",".join(fields)
+    else:
+        select = "id,timestamp,data"
+
+    for page in _iter_pages(columns=select, start=start, end=end, page_size=chunk_size):
+        frame = pd.DataFrame(page).reindex(columns=columns) if columns else _rows_to_frame(page)
+        yield frame
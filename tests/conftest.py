@@ -0,0 +1,8 @@
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Modul yang membuat write buffer saat import (supabase_manager) tidak menulis ke shared store repo.
+os.environ.setdefault("SHARED_STATE_PATH", os.path.join(tempfile.mkdtemp(prefix="survey-tests-"), "shared.db"))
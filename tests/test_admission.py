@@ -0,0 +1,102 @@
+import pytest
+
+import admission
+
+class FakeTime:
+    """Jam palsu untuk admission: sleep memajukan monotonic tanpa menunggu."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+def down():
+    raise ConnectionError("database down")
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeTime()
+    monkeypatch.setattr(admission, "time", clock)
+    return clock
+
+def test_token_bucket_allows_burst_then_refills(clock):
+    bucket = admission.TokenBucket(rate=2, capacity=3)
+    assert all(bucket.acquire() for _ in range(3))
+    assert not bucket.acquire()
+
+    clock.now += 0.5
+    assert bucket.acquire()
+    assert not bucket.acquire()
+
+    clock.now += 10
+    assert bucket.available() == 3  # tidak melebihi kapasitas
+
+def test_token_bucket_waits_up_to_timeout(clock):
+    bucket = admission.TokenBucket(rate=1, capacity=1)
+    assert bucket.acquire()
+    assert not bucket.acquire(timeout=0.5)
+
+    start = clock.now
+    assert bucket.acquire(timeout=2)
+    assert clock.now - start == pytest.approx(1.0)
+
+def test_breaker_opens_after_threshold_and_half_opens_after_cooldown(clock):
+    breaker = admission.CircuitBreaker(threshold=2, cooldown=10)
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    assert breaker.retry_after() == 10
+
+    clock.now += 10
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()  # hanya satu percobaan selama half-open
+
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow()
+    assert breaker.trips == 1
+
+def test_failed_half_open_trial_reopens_breaker(clock):
+    breaker = admission.CircuitBreaker(threshold=1, cooldown=10)
+    breaker.record_failure()
+    clock.now += 10
+    assert breaker.allow()
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert breaker.retry_after() == 10
+    assert breaker.trips == 2
+
+def test_gate_diverts_failures_and_rejections_to_fallback(clock):
+    gate = admission.AdmissionGate("test", rate=100, burst=100, concurrency=1, threshold=2, cooldown=10)
+
+    assert gate.run(down, fallback=lambda: "fallback") == "fallback"
+    assert gate.run(lambda: False, fallback=lambda: "fallback") == "fallback"
+    assert gate.breaker.state == "open"
+
+    # Breaker terbuka: fn tidak dipanggil sama sekali.
+    calls = []
+    assert gate.run(lambda: calls.append(1), fallback=lambda: "fallback") == "fallback"
+    assert calls == []
+    assert gate.counts == {"admitted": 0, "failed": 2, "rejected": 0, "open": 1, "fallback": 3}
+
+    clock.now += 10
+    assert gate.run(lambda: "ok", fallback=lambda: "fallback") == "ok"
+    assert gate.breaker.state == "closed"
+
+def test_gate_without_fallback_raises(clock):
+    gate = admission.AdmissionGate("test", rate=1, burst=1, concurrency=1, timeout=0)
+    assert gate.run(lambda: "ok") == "ok"
+    with pytest.raises(admission.Rejected):
+        gate.run(lambda: "ok")  # token habis
+
+    clock.now += 1
+    with pytest.raises(ConnectionError):
+        gate.run(down)
@@ -0,0 +1,92 @@
+import smtplib
+
+import pytest
+
+import admission
+import email_queue
+import shared_state
+
+class StubSMTP:
+    """Stand-in smtplib.SMTP: email yang diterima dicatat di `sent`, kegagalan diatur lewat `failures`."""
+
+    sent = []
+    failures = []  # exception yang di-raise sendmail berikutnya, urut
+    connections = 0
+
+    def __init__(self, host, port, timeout=None):
+        StubSMTP.connections += 1
+        self.timeout = timeout
+
+    def ehlo(self):
+        pass
+
+    def has_extn(self, name):
+        return False
+
+    def sendmail(self, sender, recipient, message):
+        if StubSMTP.failures:
+            raise StubSMTP.failures.pop(0)
+        StubSMTP.sent.append((recipient, message))
+
+    def quit(self):
+        pass
+
+@pytest.fixture
+def queue(tmp_path, monkeypatch):
+    monkeypatch.setattr(StubSMTP, "sent", [])
+    monkeypatch.setattr(StubSMTP, "failures", [])
+    monkeypatch.setattr(StubSMTP, "connections", 0)
+    monkeypatch.setattr(smtplib, "SMTP", StubSMTP)
+    monkeypatch.setattr(admission, "_gates", {})
+    store = shared_state.SharedStore(str(tmp_path / "shared.db"))
+    return email_queue.EmailQueue("localhost", 25, "survey@example.com", "secret", store=store,
+                                  starttls=False, backoff_base=0, worker=False)
+
+def jobs(queue):
+    return queue.store.claim(email_queue.EMAIL_QUEUE, limit=10, lease=0)
+
+def test_sent_email_is_acked(queue):
+    queue.enqueue("budi@example.com", "halo")
+    assert queue.process_next()
+    assert StubSMTP.sent == [("budi@example.com", "halo")]
+    assert queue.stats()["sent"] == 1
+    assert not queue.process_next()
+
+def test_failed_send_is_retried_then_dropped(queue):
+    queue.max_retries = 2
+    StubSMTP.failures = [smtplib.SMTPDataError(451, "coba lagi"), smtplib.SMTPDataError(451, "coba lagi")]
+    queue.enqueue("budi@example.com", "halo")
+
+    assert queue.process_next()
+    assert jobs(queue)[0][2] == 1  # dilepas dengan satu percobaan tercatat
+    assert queue.process_next()
+    assert jobs(queue) == []
+    assert queue.stats()["failed"] == 1
+    assert StubSMTP.sent == []
+
+def test_disconnect_reconnects_and_renews_lease(queue, monkeypatch):
+    leases = []
+    monkeypatch.setattr(queue.store, "extend", lambda job_ids, lease: leases.append(lease))
+    StubSMTP.failures = [smtplib.SMTPServerDisconnected()]
+    queue.enqueue("budi@example.com", "halo")
+
+    assert queue.process_next()
+    assert StubSMTP.sent == [("budi@example.com", "halo")]
+    assert StubSMTP.connections == 2
+    assert leases == [email_queue.SEND_LEASE]
+
+def test_open_breaker_releases_without_spending_retries(queue):
+    breaker = admission.get_gate("smtp").breaker
+    for _ in range(breaker.threshold):
+        breaker.record_failure()
+    queue.enqueue("budi@example.com", "halo")
+
+    assert queue.process_next()
+    assert StubSMTP.sent == []
+    assert queue.stats()["retrying"] == 1
+    assert jobs(queue) == []  # ditunda sampai breaker boleh dicoba lagi
+    assert queue.store._conn().execute("SELECT attempts FROM jobs").fetchone() == (0,)
+
+def test_lease_covers_gate_wait_and_one_attempt():
+    # Konek (connect, EHLO, STARTTLS, EHLO, AUTH) + sendmail (MAIL, RCPT, DATA, isi, QUIT).
+    assert email_queue.SEND_LEASE >= admission.ADMIT_TIMEOUT + 10 * email_queue.SMTP_TIMEOUT
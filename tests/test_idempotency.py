@@ -0,0 +1,55 @@
+import threading
+
+import pytest
+
+import dedup_responses
+import local_db_manager
+import shared_state
+from idempotency import SubmissionIndex
+
+@pytest.fixture
+def store(tmp_path):
+    return shared_state.SharedStore(str(tmp_path / "shared.db"))
+
+@pytest.fixture
+def local_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(local_db_manager, "_SEGMENT_DIR", str(tmp_path / "store" / "segments"))
+    monkeypatch.setattr(local_db_manager, "_PART_DIR", str(tmp_path / "store" / "parts"))
+    monkeypatch.setattr(local_db_manager, "_LOCK_FILE", str(tmp_path / "store" / "store.lock"))
+    monkeypatch.setattr(local_db_manager, "CSV_FILE", str(tmp_path / "survey_results.csv"))
+    monkeypatch.setattr(local_db_manager, "_segment", {"path": None, "rows": 0})
+
+def test_contains_sees_keys_claimed_by_other_workers(store):
+    worker_a = SubmissionIndex(store)
+    worker_b = SubmissionIndex(store)  # dibuat sebelum worker_a mengklaim key
+
+    assert worker_a.claim("k1")
+    assert "k1" in worker_b
+    assert not worker_b.claim("k1")
+    assert "k2" not in worker_b
+
+def test_local_dedup_keeps_rows_appended_during_rewrite(local_store, monkeypatch):
+    response = {'nama': 'Anonim', 'anonim': 'Ya', 'kepuasan_akhir': 'Puas'}
+    local_db_manager.append_records([
+        dict(response, timestamp='2024-01-01T00:00:00'),
+        dict(response, timestamp='2024-01-01T00:01:00'),
+    ])
+
+    appender = None
+    original = dedup_responses.find_duplicates
+
+    def find_duplicates(rows, window):
+        # Worker lain submit saat dedup sedang membaca: append harus menunggu lock exclusive.
+        nonlocal appender
+        appender = threading.Thread(target=local_db_manager.append_records, args=([
+            dict(response, nama='Baru', timestamp='2024-01-02T00:00:00'),
+        ],))
+        appender.start()
+        return original(rows, window)
+
+    monkeypatch.setattr(dedup_responses, "find_duplicates", find_duplicates)
+    assert len(dedup_responses._local(apply=True, window=600)) == 1
+    appender.join()
+
+    frame = local_db_manager.fetch_all_responses()
+    assert sorted(frame['nama']) == ['Anonim', 'Baru']
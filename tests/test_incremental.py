@@ -0,0 +1,58 @@
+import pandas as pd
+import pytest
+
+import shared_state
+from rollups import RollupStore
+from wordfreq import WordFrequencyIndex
+
+def frame(texts, ids=None):
+    data = {
+        'timestamp': [f"2024-01-01T00:{i // 60:02d}:{i % 60:02d}" for i in range(len(texts))],
+        'pesan_akhir': texts,
+        'kompetitor_nama': ['OVO'] * len(texts),
+        'niat_penggunaan': ['Ya, Pasti'] * len(texts),
+    }
+    if ids is not None:
+        data['submission_id'] = ids
+    return pd.DataFrame(data)
+
+@pytest.fixture
+def store(tmp_path):
+    return shared_state.SharedStore(str(tmp_path / "shared.db"))
+
+def test_rows_inserted_between_seen_rows_are_added_without_rebuild(store):
+    index = WordFrequencyIndex(store)
+    first = frame(["aplikasi cepat", "transfer lambat", "promo banyak"])
+    assert index.update(first) == 3
+
+    # Segment proses lain ikut terbaca: baris baru muncul di tengah, urutan berubah.
+    grown = pd.concat([first.iloc[:1], frame(["aplikasi ribet"]).assign(timestamp="2024-01-02T00:00:00"),
+                       first.iloc[1:]]).iloc[::-1]
+    assert index.update(grown) == 1
+    assert index.update(grown) == 0
+    assert index.frequencies(['pesan_akhir'])['aplikasi'] == 2
+
+def test_removed_row_rebuilds_aggregate(store):
+    rollups = RollupStore(store)
+    rows = frame(["a", "b", "c"], ids=["k1", "k2", "k3"])
+    rollups.update(rows)
+    assert rollups.query()['responden'].iloc[0] == 3
+
+    assert rollups.update(rows.iloc[[0, 2]]) == 2  # k2 dihapus (dedup): hitung ulang
+    assert rollups.query()['responden'].iloc[0] == 2
+
+def test_identical_rows_are_counted_separately(store):
+    rollups = RollupStore(store)
+    rows = pd.concat([frame(["sama"])] * 2, ignore_index=True)
+    assert rollups.update(rows) == 2
+    assert rollups.query()['responden'].iloc[0] == 2
+
+def test_state_is_shared_between_workers(store):
+    rows = frame(["aplikasi cepat", "transfer lambat"])
+    worker_a = WordFrequencyIndex(store)
+    assert worker_a.update(rows.iloc[:1]) == 1
+
+    worker_b = WordFrequencyIndex(store)
+    assert worker_b.update(rows) == 1  # baris pertama sudah dihitung worker_a
+    assert worker_a.update(rows) == 0
+    assert worker_a.frequencies(['pesan_akhir']) == worker_b.frequencies(['pesan_akhir'])
@@ -0,0 +1,25 @@
+import pandas as pd
+import pytest
+
+from raw_table import RawTableIndex
+from schema import to_compact_frame
+
+@pytest.fixture
+def table():
+    return RawTableIndex(to_compact_frame(pd.DataFrame({
+        'timestamp': ['2024-01-02', '2024-01-01', None, '2024-01-03'],
+        'kepuasan_akhir': ['Puas', None, 'Kecewa', 'Puas'],
+        'pesan_akhir': ['b', None, 'a', 'c'],
+    })))
+
+@pytest.mark.parametrize("column", ['timestamp', 'kepuasan_akhir', 'pesan_akhir'])
+def test_empty_values_sort_last_in_both_directions(table, column):
+    ascending = table.query(sort=column).tolist()
+    descending = table.query(sort=column, descending=True).tolist()
+    empty = table.df[column].isna().to_numpy().nonzero()[0].tolist()
+    assert ascending[-len(empty):] == empty
+    assert descending[-len(empty):] == empty
+    assert descending[:-len(empty)] != ascending[:-len(empty)]
+
+def test_descending_keeps_ties_in_original_order(table):
+    assert table.query(sort='kepuasan_akhir', descending=True).tolist() == [0, 3, 2, 1]
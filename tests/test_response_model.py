@@ -0,0 +1,73 @@
+import pandas as pd
+
+from response_model import SCHEMA_VERSION, SurveyResponse, decode_rows, pack_data, unpack_data
+
+RESPONSE = {
+    'nama': 'Budi', 'email': 'budi@example.com', 'anonim': 'Tidak',
+    'topup_score': 'Mudah', 'topup_feedback': 'cepat', 'transfer_score': 'Sulit', 'transfer_feedback': '',
+    'split_score': 'Mudah', 'split_feedback': '', 'shared_score': 'Biasa', 'shared_feedback': '',
+    'ui_navigasi': 'Cukup Jelas', 'ui_performa': 'Cepat', 'kompetitor_nama': 'GoPay', 'kompetitor_fitur': '',
+    'kepuasan_akhir': 'Puas', 'niat_penggunaan': 'Ya, Pasti', 'pesan_akhir': 'mantap',
+}
+
+def test_pack_unpack_round_trip_keeps_extra_keys():
+    data = dict(RESPONSE, submission_id='abc', sumber='kiosk')
+    assert unpack_data(pack_data(data)) == dict(data, schema_version=SCHEMA_VERSION)
+
+    # Tanpa submission_id, key itu tidak muncul setelah unpack (sama seperti dict aslinya).
+    unpacked = unpack_data(pack_data(RESPONSE))
+    assert 'submission_id' not in unpacked
+    assert unpack_data(RESPONSE) is RESPONSE
+
+def test_validate_reports_each_problem():
+    assert SurveyResponse.from_dict(RESPONSE).validate() == []
+
+    errors = SurveyResponse.from_dict(dict(
+        RESPONSE, email='bukan-email', nama=' ', topup_score=None, kompetitor_nama='Jenius', pesan_akhir='x' * 2001,
+    )).validate()
+    assert errors == [
+        "topup_score belum diisi",
+        "kompetitor_nama: pilihan tidak dikenal (Jenius)",
+        "pesan_akhir terlalu panjang (maks 2000 karakter)",
+        "nama belum diisi",
+        "format email tidak valid",
+    ]
+    # Respon anonim tidak wajib nama/email.
+    assert SurveyResponse.from_dict(dict(RESPONSE, anonim='Ya', nama='Anonim', email='-')).validate() == []
+
+def test_v1_rows_derive_anonim_and_strip_text():
+    v1 = [
+        {'nama': 'Anonim', 'pesan_akhir': '  ok  '},
+        {'nama': 'Budi', 'pesan_akhir': ' bagus'},
+        {'nama': 'Sari', 'anonim': 'Ya', 'pesan_akhir': 'x '},  # anonim sudah diisi: tidak diturunkan ulang
+    ]
+    frame = decode_rows(v1)
+    assert frame['anonim'].tolist() == ['Ya', 'Tidak', 'Ya']
+    assert frame['pesan_akhir'].tolist() == ['ok', 'bagus', 'x']
+    assert frame['schema_version'].tolist() == [SCHEMA_VERSION] * 3
+
+def test_v2_rows_are_not_migrated():
+    frame = decode_rows([dict(RESPONSE, schema_version=2, anonim=None, nama='Anonim', pesan_akhir=' spasi ')])
+    assert frame['anonim'].isna().tolist() == [True]
+    assert frame['pesan_akhir'].tolist() == [' spasi ']
+
+def test_decode_rows_mixes_dict_packed_and_empty_rows():
+    rows = [
+        {'nama': 'Anonim', 'kompetitor_nama': 'OVO'},  # v1 (JSON lama)
+        pack_data(dict(RESPONSE, sumber='kiosk')),
+        None,
+    ]
+    frame = decode_rows(rows, timestamps=['2024-01-01', '2024-01-02', '2024-01-03'])
+
+    assert frame['nama'].tolist()[:2] == ['Anonim', 'Budi']
+    assert frame['anonim'].tolist()[:2] == ['Ya', 'Tidak']
+    assert frame['kompetitor_nama'].tolist()[:2] == ['OVO', 'GoPay']
+    assert isinstance(frame['kompetitor_nama'].dtype, pd.CategoricalDtype)
+    assert frame['sumber'].tolist() == [None, 'kiosk', None]
+    assert frame['timestamp'].tolist() == ['2024-01-01', '2024-01-02', '2024-01-03']
+
+def test_decode_rows_packed_batch_matches_dict_batch():
+    rows = [dict(RESPONSE, nama=f'R{i}', submission_id=f'k{i}') for i in range(3)]
+    packed = decode_rows([pack_data(row) for row in rows])
+    plain = decode_rows([dict(row, schema_version=SCHEMA_VERSION) for row in rows])
+    pd.testing.assert_frame_equal(packed, plain)
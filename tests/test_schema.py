@@ -0,0 +1,21 @@
+import pandas as pd
+
+from schema import TEXT_DTYPE, concat_compact, to_compact_frame
+
+def test_concat_compact_aligns_categories_and_missing_columns():
+    snapshot = to_compact_frame(pd.DataFrame({
+        'timestamp': ['2024-01-01T00:00:00'], 'kompetitor_nama': ['OVO'], 'pesan_akhir': ['ok'],
+    }))
+    new = pd.DataFrame({'timestamp': ['2024-01-02T00:00:00'], 'kompetitor_nama': ['Jenius']})
+
+    frame = concat_compact([snapshot, new])
+    assert frame['kompetitor_nama'].tolist() == ['OVO', 'Jenius']
+    assert list(frame['kompetitor_nama'].cat.categories[:2]) == ['GoPay', 'OVO']
+    assert frame['pesan_akhir'].dtype == TEXT_DTYPE
+    assert frame['pesan_akhir'].isna().tolist() == [False, True]
+    assert pd.api.types.is_datetime64_any_dtype(frame['timestamp'])
+
+def test_concat_compact_skips_empty_frames():
+    new = pd.DataFrame({'kompetitor_nama': ['OVO']})
+    frame = concat_compact([pd.DataFrame(), new])
+    assert isinstance(frame['kompetitor_nama'].dtype, pd.CategoricalDtype)
@@ -0,0 +1,157 @@
+import pandas as pd
+import pytest
+
+import admission
+import shared_state
+import storage
+
+RESPONSE = {'nama': 'Anonim', 'email': '-', 'anonim': 'Ya', 'kepuasan_akhir': 'Puas', 'pesan_akhir': 'mantap'}
+
+@pytest.fixture
+def backend(tmp_path, monkeypatch):
+    monkeypatch.setattr(shared_state, "_store", shared_state.SharedStore(str(tmp_path / "shared.db")))
+    monkeypatch.setattr(admission, "_gates", {})
+    monkeypatch.setattr(storage, "FALLBACK_JOURNAL", str(tmp_path / "fallback.jsonl"))
+    backend = storage.SQLBackend(f"sqlite:///{tmp_path / 'survey.db'}", queue="test.sql")
+    monkeypatch.setattr(storage, "_backend", backend)
+    yield backend
+    backend.engine.dispose()
+
+def flush_all(backend):
+    while backend.write_buffer.pending_count():
+        assert backend.write_buffer.flush()
+
+def test_interface_is_abstract():
+    with pytest.raises(TypeError):
+        storage.StorageBackend()
+
+def test_save_goes_through_write_buffer(backend):
+    assert backend.save_survey_response(RESPONSE)
+    assert backend.write_buffer.pending_count() == 1
+
+    flush_all(backend)
+    frame = backend.fetch_all_responses()
+    assert frame['nama'].tolist() == ['Anonim']
+    assert isinstance(frame['kepuasan_akhir'].dtype, pd.CategoricalDtype)
+    assert frame['schema_version'].tolist() == [2]
+
+def test_incremental_fetch_keeps_late_rows(backend):
+    backend.save_survey_response(RESPONSE)
+    flush_all(backend)
+    assert len(backend.fetch_all_responses()) == 1
+
+    # Replay/flush terlambat: timestamp lebih tua dari baris yang sudah disinkron.
+    backend.insert_many([{"timestamp": "2020-01-01T00:00:00", "data": dict(RESPONSE, nama='Lama')}])
+    flush_all(backend)
+    frame = backend.fetch_all_responses()
+    assert frame['nama'].tolist() == ['Anonim', 'Lama']
+    assert str(frame['timestamp'].iloc[-1]).startswith('2020-01-01')
+
+def test_incremental_fetch_keeps_compact_dtypes(backend):
+    backend.save_survey_response(RESPONSE)
+    flush_all(backend)
+    backend.fetch_all_responses()
+
+    # Baris baru membawa kolom yang belum ada di snapshot dan kategori di luar form.
+    backend.save_survey_response(dict(RESPONSE, kepuasan_akhir='Sangat Puas', kompetitor_nama='Jenius'))
+    flush_all(backend)
+    frame = backend.fetch_all_responses()
+    assert frame['kepuasan_akhir'].tolist() == ['Puas', 'Sangat Puas']
+    assert frame['kompetitor_nama'].tolist()[1] == 'Jenius'
+    assert (frame.dtypes == object).sum() == 0
+    assert isinstance(frame['kepuasan_akhir'].dtype, pd.CategoricalDtype)
+    assert isinstance(frame['kompetitor_nama'].dtype, pd.CategoricalDtype)
+
+def test_summary_counts_only_new_rows(backend):
+    backend.save_survey_response(RESPONSE)
+    flush_all(backend)
+    assert backend.fetch_summary()['total'] == 1
+
+    backend.save_survey_response(RESPONSE)
+    flush_all(backend)
+    summary = backend.fetch_summary()
+    assert summary['total'] == 2
+    assert summary['histograms']['kepuasan_akhir']['Puas'] == 2
+
+def test_cache_generation_bumps_once_after_commit(backend):
+    store = shared_state.get_store()
+    generation = store.generation("responses")
+    assert storage.save_survey_response(RESPONSE)
+    assert store.generation("responses") == generation  # baru di antrian, belum di database
+
+    flush_all(backend)
+    assert store.generation("responses") == generation + 1
+
+def test_db_outage_opens_breaker_without_spending_attempts(backend, monkeypatch):
+    def down(payloads):
+        raise ConnectionError("database down")
+    monkeypatch.setattr(backend.write_buffer, "sink", down)
+    backend.save_survey_response(RESPONSE)
+
+    for _ in range(admission.BREAKER_THRESHOLD):
+        assert not backend.write_buffer.flush()
+    assert admission.get_gate("db").breaker.state == "open"
+
+    # Breaker terbuka: flush ditolak gate, job tetap di antrian tanpa percobaan tambahan.
+    assert not backend.write_buffer.flush()
+    jobs = shared_state.get_store().claim("test.sql")
+    assert jobs[0][2] == admission.BREAKER_THRESHOLD
+    assert backend.write_buffer.dead_count() == 0
+
+def test_rejected_submit_goes_to_fallback_journal_and_replays(backend):
+    submit = admission.get_gate("submit")
+    for _ in range(admission.BREAKER_THRESHOLD):
+        submit.breaker.record_failure()
+
+    assert storage.save_survey_response(dict(RESPONSE, nama='Tertunda'))
+    assert backend.write_buffer.pending_count() == 0
+    assert storage.fallback_pending() == 1
+
+    assert storage.replay_fallback() == 1
+    assert storage.fallback_pending() == 0
+    flush_all(backend)
+    assert backend.fetch_all_responses()['nama'].tolist() == ['Tertunda']
+
+def test_fallback_survives_shared_store_failure(backend, monkeypatch):
+    def broken(payloads):
+        raise OSError("disk I/O error")
+    monkeypatch.setattr(shared_state.get_store(), "push", broken)
+
+    # Backend gagal karena shared store rusak: respon tetap tersimpan di journal fallback.
+    assert storage.save_survey_response(dict(RESPONSE, nama='Tertunda'))
+    assert storage.fallback_pending() == 1
+
+def test_failed_replay_keeps_unsent_responses(backend, monkeypatch):
+    for nama in ['A', 'B', 'C']:
+        assert storage._save_fallback(dict(RESPONSE, nama=nama))
+
+    insert_many = backend.insert_many
+    batches = []
+    def flaky_insert_many(payloads):
+        batches.append([p['data']['nama'] for p in payloads])
+        if len(batches) == 2:
+            raise ConnectionError("database down")
+        insert_many(payloads)
+    monkeypatch.setattr(backend, "insert_many", flaky_insert_many)
+
+    with pytest.raises(ConnectionError):
+        storage.replay_fallback(batch_size=2)
+    assert storage.fallback_pending() == 1
+
+    # Submit baru selama backend gagal masuk journal baru; replay berikutnya mengirim sisa lalu yang baru.
+    storage._save_fallback(dict(RESPONSE, nama='D'))
+    assert storage.replay_fallback(batch_size=2) == 2
+    assert batches == [['A', 'B'], ['C'], ['C'], ['D']]
+    assert storage.fallback_pending() == 0
+    flush_all(backend)
+    assert backend.fetch_all_responses()['nama'].tolist() == ['A', 'B', 'C', 'D']
+
+def test_summary_full_refresh_recounts_after_delete(backend):
+    backend.save_survey_response(RESPONSE)
+    backend.save_survey_response(RESPONSE)
+    flush_all(backend)
+    assert backend.fetch_summary()['total'] == 2
+
+    with backend.engine.begin() as conn:
+        conn.execute(backend.table.delete().where(backend.table.c.id == 1))
+    assert backend.fetch_summary(full_refresh=True)['total'] == 1
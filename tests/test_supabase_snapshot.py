@@ -0,0 +1,117 @@
+import os
+import sys
+
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+import shared_state
+import supabase_manager
+from fake_supabase import FakeSupabase
+
+RESPONSE = {'nama': 'Anonim', 'email': '-', 'anonim': 'Ya', 'kepuasan_akhir': 'Puas'}
+
+def new_state():
+    return {"frame": pd.DataFrame(), "cursor": None, "version": None, "epoch": None, "head": None}
+
+@pytest.fixture
+def fake(tmp_path, monkeypatch):
+    monkeypatch.setattr(shared_state, "_store", shared_state.SharedStore(str(tmp_path / "shared.db")))
+    fake = FakeSupabase()
+    monkeypatch.setattr(supabase_manager, "_client", fake)
+    monkeypatch.setattr(supabase_manager, "_snapshot", new_state())
+    return fake
+
+def insert(fake, n):
+    rows = [{"timestamp": f"2024-01-01T00:00:{i % 60:02d}", "data": dict(RESPONSE, nama=f"r{i}")} for i in range(n)]
+    fake.table(supabase_manager.TABLE_NAME).insert(rows).execute()
+
+def sync(worker, full_refresh=False):
+    """Jalankan fetch dengan state lokal `worker` (mensimulasikan proses terpisah)."""
+    supabase_manager._snapshot.clear()
+    supabase_manager._snapshot.update(worker)
+    frame = supabase_manager.fetch_all_responses(full_refresh=full_refresh)
+    worker.clear()
+    worker.update(supabase_manager._snapshot)
+    return frame
+
+def segments():
+    return [rows for _, rows in shared_state.get_store().get(supabase_manager.SNAPSHOT_KEY)[1]["segments"]]
+
+def test_sync_publishes_only_delta_segments(fake):
+    a, b = new_state(), new_state()
+    insert(fake, 8)
+    sync(a)
+    assert segments() == [8]
+
+    insert(fake, 2)
+    sync(a)
+    assert segments() == [8, 2]
+    insert(fake, 2)
+    sync(a)
+    assert segments() == [8, 4]  # segmen sama besar digabung
+
+    frame = sync(b)
+    assert b["cursor"] == 12 and b["head"]["rows"] == 12  # b mengadopsi snapshot dari segmen
+    assert len(frame) == 12
+    assert frame['nama'].tolist() == [f"r{i}" for i in range(8)] + ["r0", "r1", "r0", "r1"]
+
+def test_lost_publish_race_keeps_rows_consistent(fake, monkeypatch):
+    a, b = new_state(), new_state()
+    insert(fake, 4)
+    sync(a)
+    sync(b)
+
+    insert(fake, 3)
+    sync(a)
+    with monkeypatch.context() as m:
+        # b membaca head sebelum a menerbitkan: menarik baris yang sama dan compare-and-set-nya kalah.
+        m.setattr(supabase_manager, "_adopt_snapshot", lambda: None)
+        sync(b)
+    assert b["head"]["rows"] == 4 and segments() == [4, 3]
+
+    insert(fake, 1)
+    frame_a, frame_b = sync(a), sync(b)
+    assert len(frame_a) == len(frame_b) == 8
+    assert frame_a['nama'].tolist() == frame_b['nama'].tolist()
+
+def test_full_refresh_replaces_segments(fake):
+    a = new_state()
+    insert(fake, 4)
+    sync(a)
+    insert(fake, 4)
+    sync(a)
+    assert len(segments()) == 1
+
+    sync(a, full_refresh=True)
+    keys = [key for key, _ in shared_state.get_store().items(supabase_manager.SEGMENT_PREFIX)]
+    assert len(keys) == 1 and a["epoch"] in keys[0]
+
+    supabase_manager.clear_shared_snapshot()
+    assert shared_state.get_store().items(supabase_manager.SEGMENT_PREFIX) == []
+
+def delete_rows(fake, ids):
+    fake.rows = [row for row in fake.rows if row["id"] not in ids]
+    fake.keys = [row["id"] for row in fake.rows]
+
+def test_summary_resets_after_shared_snapshot_is_cleared(fake, monkeypatch):
+    monkeypatch.setattr(supabase_manager, "_summary", {"summary": supabase_manager.ResponseSummary(), "cursor": None, "version": None})
+    insert(fake, 3)
+    assert supabase_manager.fetch_summary()['total'] == 3
+
+    # dedup_responses --apply: baris dihapus di server lalu snapshot bersama dibersihkan.
+    delete_rows(fake, {2, 3})
+    supabase_manager.clear_shared_snapshot()
+    assert supabase_manager.fetch_summary()['total'] == 1
+
+def test_summary_full_refresh_recounts_all_rows(fake, monkeypatch):
+    monkeypatch.setattr(supabase_manager, "_summary", {"summary": supabase_manager.ResponseSummary(), "cursor": None, "version": None})
+    insert(fake, 3)
+    assert supabase_manager.fetch_summary()['total'] == 3
+
+    delete_rows(fake, {1})
+    assert supabase_manager.fetch_summary()['total'] == 3  # inkremental: baris yang dihapus tidak terlihat
+    assert supabase_manager.fetch_summary(full_refresh=True)['total'] == 2
+    _, shared = shared_state.get_store().get(supabase_manager.SUMMARY_KEY)
+    assert shared["summary"].to_dict()['total'] == 2
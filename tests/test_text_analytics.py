@@ -0,0 +1,35 @@
+import pandas as pd
+import pytest
+
+import shared_state
+from text_analytics import TextAnalytics
+
+def frame(texts):
+    return pd.DataFrame({
+        'timestamp': [f"2024-01-01T00:00:{i:02d}" for i in range(len(texts))],
+        'topup_feedback': texts,
+    })
+
+@pytest.fixture
+def store(tmp_path):
+    return shared_state.SharedStore(str(tmp_path / "shared.db"))
+
+def test_update_only_analyzes_new_rows(store):
+    texts = ["topup sangat mudah", "transfer lambat banget", "split bill ribet"]
+    analytics = TextAnalytics(store)
+    assert analytics.update(frame(texts[:2])) == 2
+    assert analytics.update(frame(texts)) == 1
+    assert analytics.update(frame(texts)) == 0
+
+    rebuilt = TextAnalytics(store)
+    assert rebuilt.update(frame(texts)) == 0  # hasil diambil dari shared store
+    pd.testing.assert_frame_equal(analytics.feature_sentiment(), rebuilt.feature_sentiment())
+    pd.testing.assert_frame_equal(analytics.top_phrases(), rebuilt.top_phrases())
+    assert analytics.feature_sentiment().loc['Top Up', 'Komentar'] == 3
+
+def test_full_refresh_rebuilds_aggregates(store):
+    analytics = TextAnalytics(store)
+    analytics.update(frame(["topup sangat mudah", "topup ribet"]))
+    analytics.update(frame(["topup ribet"]))  # baris berbeda di posisi yang sudah dilihat
+    assert analytics.feature_sentiment().loc['Top Up', 'Komentar'] == 1
+    assert analytics.feature_sentiment().loc['Top Up', 'Negatif (%)'] == 100
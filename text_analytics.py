@@ -0,0 +1,193 @@
+import re
+from collections import Counter
+
+import pandas as pd
+
+from incremental import IncrementalAggregate, response_ids
+from wordfreq import FEEDBACK_FIELDS, tokenize
+
+RESULT_PREFIX = "text:"
+BATCH_SIZE = 500  # hasil disimpan per batch, jadi rerun yang terputus tidak mengulang dari awal
+
+# Field per fitur; kompetitor_fitur dan pesan_akhir hanya ditandai lewat kata kunci.
+FIELD_FEATURES = {
+    'topup_feedback': 'Top Up',
+    'transfer_feedback': 'Transfer',
+    'split_feedback': 'Split Bill',
+    'shared_feedback': 'Shared Wallet',
+}
+FEATURE_KEYWORDS = {
+    'Top Up': {'topup', 'top', 'saldo', 'isi', 'va', 'virtual', 'account'},
+    'Transfer': {'transfer', 'kirim', 'tf', 'rekening', 'penerima'},
+    'Split Bill': {'split', 'bill', 'patungan', 'tagihan'},
+    'Shared Wallet': {'shared', 'bersama', 'keluarga', 'anggota'},
+    'UI/Tampilan': {'tampilan', 'warna', 'desain', 'ui', 'menu', 'navigasi', 'tombol', 'font', 'oranye', 'ikon'},
+    'Performa': {'loading', 'lambat', 'lemot', 'cepat', 'performa', 'crash', 'error', 'lag', 'hang', 'lelet'},
+    'Notifikasi': {'notifikasi', 'notif'},
+    'Promo': {'promo', 'cashback', 'diskon', 'poin', 'reward', 'voucher'},
+    'Paylater': {'paylater', 'cicilan', 'kredit'},
+}
+_KEYWORD_INDEX = {}  # kata -> fitur, agar tagging cukup satu lookup per token
+for _feature, _keywords in FEATURE_KEYWORDS.items():
+    for _keyword in _keywords:
+        _KEYWORD_INDEX.setdefault(_keyword, set()).add(_feature)
+
+# Leksikon sentimen sederhana (kata dasar + slang umum).
+POSITIVE_WORDS = {
+    'mudah', 'gampang', 'cepat', 'lancar', 'bagus', 'mantap', 'mantab', 'membantu', 'praktis', 'jelas',
+    'menarik', 'nyaman', 'keren', 'simpel', 'simple', 'sederhana', 'aman', 'bersih', 'suka', 'puas',
+    'rapi', 'responsif', 'oke', 'ok', 'baik', 'hebat', 'semangat', 'intuitif', 'stabil', 'mulus',
+    'enak', 'berguna', 'lengkap', 'informatif', 'top', 'sukses', 'efisien',
+}
+NEGATIVE_WORDS = {
+    'susah', 'sulit', 'lambat', 'lemot', 'lelet', 'ribet', 'bingung', 'membingungkan', 'error', 'gagal',
+    'telat', 'lama', 'jelek', 'buruk', 'crash', 'kendala', 'masalah', 'bug', 'kecewa', 'rumit',
+    'hang', 'lag', 'mahal', 'berat', 'terlambat', 'ngelag', 'force', 'macet', 'hilang',
+    'salah', 'aneh', 'repot', 'pusing',
+}
+NEGATORS = {'tidak', 'tak', 'gak', 'nggak', 'enggak', 'ga', 'ngga', 'bukan', 'belum', 'tdk', 'gk', 'kurang'}
+INTENSIFIERS = {'sangat', 'banget', 'sekali', 'amat', 'terlalu'}
+_WORD_RE = re.compile(r"[^\W\d_]+")
+
+def sentiment(text) -> float:
+    """
+    Skor leksikon di [-1, 1]. Negator membalik polaritas dua kata sesudahnya;
+    intensifier ("sangat mudah", "ribet banget") memberi bobot 1.5 ke kata
+    sentimen di sebelahnya.
+    """
+    score = 0.0
+    hits = 0.0
+    negate = 0
+    boost = False
+    last = 0.0  # kontribusi kata tepat sebelumnya, untuk intensifier di belakang
+    for word in _WORD_RE.findall(text.lower()):
+        if word in NEGATORS:
+            negate, last = 2, 0.0
+            continue
+        if word in INTENSIFIERS:
+            if last:
+                score += last * 0.5
+                hits += 0.5
+                last = 0.0
+            else:
+                boost = True
+            continue
+        polarity = (word in POSITIVE_WORDS) - (word in NEGATIVE_WORDS)
+        last = 0.0
+        if polarity:
+            weight = 1.5 if boost else 1.0
+            last = (-polarity if negate else polarity)
+            score += last * weight
+            hits += weight
+            boost = False
+        negate = max(negate - 1, 0)
+    return score / hits if hits else 0.0
+
+def ngrams(tokens, sizes=(2, 3)) -> list:
+    return [" ".join(tokens[i:i + n]) for n in sizes for i in range(len(tokens) - n + 1)]
+
+def tag_features(tokens, field) -> list:
+    features = {FIELD_FEATURES[field]} if field in FIELD_FEATURES else set()
+    for token in tokens:
+        if token in _KEYWORD_INDEX:
+            features |= _KEYWORD_INDEX[token]
+    return sorted(features)
+
+def analyze_texts(texts: dict) -> list:
+    """Analisis semua field teks satu respon: [{field, sentiment, features, phrases}]."""
+    items = []
+    for field, text in texts.items():
+        if not isinstance(text, str) or not text.strip():
+            continue
+        tokens = tokenize(text)
+        items.append({
+            'field': field,
+            'sentiment': sentiment(text),
+            'features': tag_features(tokens, field),
+            'phrases': ngrams(tokens),
+        })
+    return items
+
+def analyze_batch(batch) -> list:
+    """[(response_id, texts)] -> [(response_id, hasil)]."""
+    return [(response_id, analyze_texts(texts)) for response_id, texts in batch]
+
+class TextAnalytics(IncrementalAggregate):
+    """
+    Hasil analisis teks per respon (sentimen, fitur, frasa), di-cache per
+    response id di shared store. `update` hanya menangani baris baru (lihat
+    IncrementalAggregate), mengambil hasil yang sudah dihitung worker lain
+    dengan satu query untuk id tersebut, menganalisis sisanya di proses ini dan
+    menambahkannya ke agregat per fitur dan per frasa. Agregat sendiri per
+    proses (tabel frasa bisa besar); tabel dashboard dihitung dari agregat,
+    bukan dari teks mentah.
+    """
+
+    def __init__(self, store=None, prefix=RESULT_PREFIX):
+        self.prefix = prefix
+        super().__init__(store)
+
+    def _clear(self):
+        self._features = {}  # fitur -> [komentar, positif, negatif, jumlah skor]
+        self._phrase_counts = Counter()
+        self._phrase_scores = Counter()
+        self._tables = {}
+
+    def _results(self, ids, texts) -> list:
+        """Hasil per baris: dari shared store jika ada, selain itu dianalisis lalu disimpan."""
+        stored = self.store.get_many(self.prefix + response_id for response_id in set(ids))
+        results = {key[len(self.prefix):]: value for key, value in stored.items()}
+        todo = list({response_id: row for response_id, row in zip(ids, texts) if response_id not in results}.items())
+        # Tanpa process pool: di Streamlit, worker spawn meng-import ulang script
+        # halaman (__main__) dan gagal. Analisis penuh hanya terjadi sekali per
+        # respon; setelah itu hasil dibaca dari shared store.
+        for i in range(0, len(todo), BATCH_SIZE):
+            analyzed = analyze_batch(todo[i:i + BATCH_SIZE])
+            results.update(analyzed)
+            self.store.set_many({self.prefix + response_id: result for response_id, result in analyzed})
+        return [results[response_id] for response_id in ids], len(todo)
+
+    def _add_items(self, items):
+        for item in items:
+            score = item['sentiment']
+            for feature in item['features']:
+                stats = self._features.setdefault(feature, [0, 0, 0, 0.0])
+                stats[0] += 1
+                stats[1] += score > 0
+                stats[2] += score < 0
+                stats[3] += score
+            for phrase in set(item['phrases']):
+                self._phrase_counts[phrase] += 1
+                self._phrase_scores[phrase] += score
+
+    def _add(self, rows) -> int:
+        """Return jumlah respon yang dianalisis di proses ini (sisanya diambil dari shared store)."""
+        fields = [f for f in FEEDBACK_FIELDS if f in rows.columns]
+        results, analyzed = self._results(response_ids(rows).tolist(), rows[fields].to_dict('records'))
+        for items in results:
+            self._add_items(items)
+        self._tables = {}
+        return analyzed
+
+    def feature_sentiment(self) -> pd.DataFrame:
+        """Per fitur: jumlah komentar, % positif/negatif dan rata-rata skor sentimen."""
+        with self._lock:
+            if 'sentiment' not in self._tables:
+                rows = [
+                    (feature, n, positive / n * 100, negative / n * 100, total / n)
+                    for feature, (n, positive, negative, total) in sorted(self._features.items())
+                ]
+                frame = pd.DataFrame(rows, columns=['Fitur', 'Komentar', 'Positif (%)', 'Negatif (%)', 'Skor Rata-rata'])
+                self._tables['sentiment'] = frame.set_index('Fitur').sort_values('Komentar', ascending=False)
+            return self._tables['sentiment']
+
+    def top_phrases(self, limit=15) -> pd.DataFrame:
+        """Frasa (bigram/trigram) terbanyak beserta rata-rata sentimen komentar yang memuatnya."""
+        with self._lock:
+            key = ('phrases', limit)
+            if key not in self._tables:
+                self._tables[key] = pd.DataFrame(
+                    [(phrase, n, self._phrase_scores[phrase] / n) for phrase, n in self._phrase_counts.most_common(limit)],
+                    columns=['Frasa', 'Jumlah', 'Sentimen'],
+                )
+            return self._tables[key]
@@ -0,0 +1,90 @@
+import io
+import re
+from collections import Counter
+
+from incremental import IncrementalAggregate
+
+FEEDBACK_FIELDS = [
+    'topup_feedback', 'transfer_feedback', 'split_feedback',
+    'shared_feedback', 'kompetitor_fitur', 'pesan_akhir',
+]
+INDEX_KEY = "wordfreq.index"
+MAX_WORDS = 200
+
+STOPWORDS_ID = {
+    'yang', 'dan', 'di', 'ke', 'dari', 'untuk', 'dengan', 'ini', 'itu', 'ada', 'tidak',
+    'juga', 'saya', 'aku', 'kami', 'kita', 'anda', 'kamu', 'akan', 'bisa', 'sudah', 'udah',
+    'belum', 'lebih', 'agar', 'supaya', 'atau', 'karena', 'krn', 'pada', 'dalam', 'sangat',
+    'sih', 'nya', 'jadi', 'kalau', 'kalo', 'saja', 'aja', 'lagi', 'masih', 'harus', 'perlu',
+    'mungkin', 'tapi', 'tetapi', 'namun', 'oleh', 'para', 'sebagai', 'seperti', 'hanya',
+    'semua', 'sama', 'lah', 'kah', 'pun', 'dong', 'deh', 'nih', 'gak', 'nggak', 'enggak',
+    'dapat', 'apa', 'bagaimana', 'kenapa', 'mau', 'ingin', 'biar', 'tolong', 'mohon',
+    'tersebut', 'hal', 'bila', 'jika', 'maka', 'sehingga', 'yg', 'dgn', 'utk', 'tdk', 'gk',
+    'the', 'and', 'for', 'with', 'nan',
+}
+_TOKEN_RE = re.compile(r"[^\W\d_]{3,}")
+
+def tokenize(text) -> list:
+    """Pecah teks jadi token huruf kecil (>= 3 huruf) tanpa stopword Indonesia."""
+    if not isinstance(text, str):
+        return []
+    return [tok for tok in _TOKEN_RE.findall(text.lower()) if tok not in STOPWORDS_ID]
+
+class WordFrequencyIndex(IncrementalAggregate):
+    """
+    Indeks frekuensi token per field feedback yang disimpan di shared store
+    dan hanya diperbarui untuk baris baru (lihat IncrementalAggregate). Indeks
+    yang sudah diperbarui worker lain dipakai apa adanya.
+    """
+
+    def __init__(self, store=None, key=INDEX_KEY):
+        self._png_cache = {}
+        super().__init__(store, key)
+
+    @property
+    def version(self) -> str:
+        return f"{self.rows_seen}-{self._stored_version}"
+
+    def _clear(self):
+        self.counts = {field: Counter() for field in FEEDBACK_FIELDS}
+        self._png_cache.clear()
+
+    def _dump(self):
+        return {field: dict(c) for field, c in self.counts.items()}
+
+    def _restore(self, state):
+        self.counts = {field: Counter(state.get(field, {})) for field in FEEDBACK_FIELDS}
+        self._png_cache.clear()
+
+    def _add(self, rows) -> int:
+        for field in FEEDBACK_FIELDS:
+            if field not in rows.columns:
+                continue
+            counter = self.counts[field]
+            for text in rows[field].dropna():
+                counter.update(tokenize(text))
+        self._png_cache.clear()
+        return len(rows)
+
+    def frequencies(self, fields) -> Counter:
+        merged = Counter()
+        for field in fields:
+            merged.update(self.counts.get(field, {}))
+        return merged
+
+    def render_png(self, fields):
+        """WordCloud PNG (bytes) untuk gabungan field, di-cache per versi indeks. None jika kosong."""
+        with self._lock:
+            key = (tuple(fields), self.version)
+            if key not in self._png_cache:
+                freqs = dict(self.frequencies(fields).most_common(MAX_WORDS))
+                png = None
+                if freqs:
+                    from wordcloud import WordCloud
+
+                    wc = WordCloud(width=800, height=400, background_color='white', colormap='viridis')
+                    buf = io.BytesIO()
+                    wc.generate_from_frequencies(freqs).to_image().save(buf, format='PNG')
+                    png = buf.getvalue()
+                self._png_cache[key] = png
+            return self._png_cache[key]
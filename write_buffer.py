@@ -0,0 +1,186 @@
+import json
+import os
+import threading
+from contextlib import contextmanager
+
+from admission import Rejected, get_gate
+from file_lock import LOCKING, file_lock
+from metrics import counter, timer
+
+class WriteBuffer:
+    """
+    Write-behind buffer untuk submit survei.
+
+    `append` menyimpan payload secara durable ke antrian `queue` di shared
+    store (SQLite WAL, lihat shared_state) lalu langsung kembali. Thread
+    flusher di tiap worker mengirim batch dari antrian yang sama ke `sink`
+    sebagai bulk insert tiap `batch_size` baris atau tiap `flush_interval`
+    detik. Flush diserialkan antar worker dengan file lock, jadi baris masuk
+    ke sink sesuai urutan antrian dan id dari database naik sesuai urutan
+    commit (sync inkremental berbasis id tidak melewatkan baris). Job dihapus
+    setelah sink berhasil; batch milik flusher yang mati diklaim ulang oleh
+    flusher berikutnya, jadi respon tidak hilang walau DB lambat atau mati. Journal JSONL format lama
+    (`legacy_journal`) diimpor sekali ke antrian saat buffer dibuat.
+
+    Setelah batch gagal, job dikirim satu per satu agar baris yang selalu
+    ditolak sink (mis. melanggar constraint) tidak menahan antrian di
+    belakangnya. Job yang gagal `max_attempts` kali dipindah ke antrian
+    dead-letter (`<queue>.dead`) dan bisa dikembalikan dengan `requeue_dead`.
+
+    Dengan `gate`, tiap panggilan sink lewat admission gate tersebut (lihat
+    admission.GATE_CONFIG): rate limit berlaku per bulk insert dan breaker
+    terbuka saat database terus gagal. Selama ditolak gate, batch ditunda
+    dengan backoff tanpa menambah hitungan percobaan.
+    """
+
+    def __init__(self, store, sink, queue="responses", legacy_journal=None, gate=None,
+                 batch_size=50, flush_interval=2.0, max_backoff=60.0, max_attempts=10):
+        self.store = store
+        self.sink = sink
+        self.queue = queue
+        self.gate = gate
+        self.dead_letter = f"{queue}.dead"
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_backoff = max_backoff
+        self.max_attempts = max_attempts
+
+        self._lock = threading.Lock()
+        self._lock_path = f"{store.path}.{queue}.flush.lock"
+        self._wake = threading.Event()
+        self._appended = 0
+        self.flushed = 0
+        self.last_error = None
+        if legacy_journal:
+            self._import_journal(legacy_journal)
+
+        self._worker = threading.Thread(target=self._run, name="write-buffer", daemon=True)
+        self._worker.start()
+
+    def _import_journal(self, path):
+        # Rename dulu: hanya satu worker yang berhasil mengambil file journal.
+        importing = path + ".importing"
+        try:
+            os.replace(path, importing)
+        except FileNotFoundError:
+            return
+        pending = []
+        with open(importing, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    pending.append(json.loads(line))
+                except ValueError:
+                    # Baris terakhir bisa terpotong jika proses mati saat menulis.
+                    print("Journal: baris rusak dilewati")
+        if pending:
+            self.store.push(self.queue, pending)
+            print(f"Journal: {len(pending)} respon lama dipindah ke antrian bersama")
+        os.remove(importing)
+
+    def append(self, payload: dict):
+        """Simpan payload secara durable ke antrian bersama untuk di-flush."""
+        self.append_many([payload])
+
+    def append_many(self, payloads: list):
+        """Seperti `append` untuk beberapa payload dalam satu commit."""
+        self.store.push(self.queue, payloads)
+        with self._lock:
+            self._appended += len(payloads)
+            if self._appended >= self.batch_size:
+                self._wake.set()
+
+    def pending_count(self) -> int:
+        """Jumlah payload yang belum tersimpan di sink (semua worker)."""
+        return self.store.queue_counts(self.queue)["total"]
+
+    def dead_count(self) -> int:
+        """Jumlah payload di antrian dead-letter (semua worker)."""
+        return self.store.queue_counts(self.dead_letter)["total"]
+
+    def requeue_dead(self) -> int:
+        """Kembalikan semua job dead-letter ke antrian utama dengan hitungan percobaan direset."""
+        jobs = self.store.claim(self.dead_letter, limit=self.dead_count() or 1)
+        self.store.move([job_id for job_id, _, _ in jobs], self.queue, reset_attempts=True)
+        if jobs:
+            self._wake.set()
+        return len(jobs)
+
+    @contextmanager
+    def _flush_lock(self, blocking=True):
+        """Yield True jika proses ini pemegang hak flush; False jika worker lain sedang flush."""
+        with file_lock(self._lock_path, blocking=blocking) as owner:
+            # Hanya pemegang lock yang mengklaim: klaim yang tersisa milik flusher yang mati.
+            # Tanpa file lock (Windows) klaim worker lain bisa masih aktif, jadi dibiarkan
+            # sampai lease-nya habis.
+            if owner and LOCKING:
+                self.store.reset_claims(self.queue)
+            yield owner
+
+    def _flush_batch(self):
+        """Klaim dan kirim satu batch. Return jumlah baris terkirim, atau None jika sink gagal atau ditolak gate."""
+        jobs = self.store.claim(self.queue, limit=self.batch_size)
+        if not jobs:
+            return 0
+        if jobs[0][2] > 0 and len(jobs) > 1:
+            # Job terdepan pernah gagal: kirim sendiri agar baris lain tidak ikut tertahan.
+            self.store.release([job_id for job_id, _, _ in jobs[1:]])
+            jobs = jobs[:1]
+        job_ids = [job_id for job_id, _, _ in jobs]
+        payloads = [payload for _, payload, _ in jobs]
+
+        try:
+            with timer("survey_flush_seconds", "Latensi bulk insert write buffer"):
+                if self.gate is None:
+                    self.sink(payloads)
+                else:
+                    # sink raise jika gagal; hasil None bukan kegagalan bagi gate.
+                    get_gate(self.gate).run(lambda: self.sink(payloads) or True)
+        except Rejected as e:
+            # Rate limit / breaker DB terbuka: tunda tanpa menghabiskan jatah percobaan.
+            self.last_error = str(e)
+            self.store.release(job_ids)
+            return None
+        except Exception as e:
+            self.last_error = str(e)
+            counter("survey_failures_total", "Kegagalan per komponen").inc(component="db_flush")
+            print("Write buffer flush failed:", e)
+            dead = [job_id for job_id, _, attempts in jobs if attempts + 1 >= self.max_attempts]
+            if dead:
+                counter("survey_dead_letters_total", "Payload write buffer yang dipindah ke dead-letter").inc(len(dead))
+                print(f"Write buffer: {len(dead)} payload gagal {self.max_attempts} kali, dipindah ke {self.dead_letter}")
+                self.store.move(dead, self.dead_letter)
+            self.store.release([job_id for job_id in job_ids if job_id not in dead], count_attempt=True)
+            return None
+
+        self.store.ack(job_ids)
+        with self._lock:
+            self.flushed += len(jobs)
+            self.last_error = None
+        return len(jobs)
+
+    def flush(self) -> bool:
+        """Kirim satu batch ke sink (menunggu flusher lain selesai). Return False jika sink gagal atau ditolak gate."""
+        with self._flush_lock():
+            return self._flush_batch() is not None
+
+    def _run(self):
+        failures = 0
+        while True:
+            wait = self.flush_interval if failures == 0 else min(self.max_backoff, self.flush_interval * 2 ** failures)
+            self._wake.wait(timeout=wait)
+            self._wake.clear()
+            with self._lock:
+                self._appended = 0
+            with self._flush_lock(blocking=False) as owner:
+                # Worker lain sedang flush dan akan ikut mengirim payload dari proses ini.
+                while owner:
+                    sent = self._flush_batch()
+                    if sent is None:
+                        failures += 1
+                        break
+                    failures = 0
+                    if sent < self.batch_size:
+                        break